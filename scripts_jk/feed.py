@@ -1,12 +1,26 @@
 #!/usr/bin/env python3
 import os, json, re, sys, pathlib, logging, traceback, time
 from datetime import datetime, timezone
+from urllib.parse import urlparse
 from logging.handlers import TimedRotatingFileHandler
-import requests, feedparser
+import requests
 from dateutil import parser as date_parse
 from feedgen.feed import FeedGenerator
 from zoneinfo import ZoneInfo
 
+# Shared helpers live in /app/shared (shared/ in the repository)
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / 'shared'))
+from feed_validator import validate_feed
+from lease import open_lease, NullLease
+from episodes import EpisodeStore, feed_item_dates, merge_items
+from websub import Publisher, add_hubs
+from artwork import CHANNEL_IMAGE_SIZE, publish_artwork
+from profiling import NullProfiler, RunProfiler
+import health
+from aggregate import Aggregate
+from search import SearchIndex
+from upstream import CircuitBreaker, CircuitOpen, RateLimited, TokenBucket
+
 # Basic configuration
 DOMAIN = os.environ.get('DOMAIN', 'localhost')
 FEED_NAME = os.environ.get('FEED_NAME', 'jk')  # ← MOVED UP: Define before using
@@ -18,9 +32,15 @@ CRO_TZ = ZoneInfo("Europe/Zagreb")
 # URLs and paths
 BASE_URL = 'https://radio.hrt.hr/slusaonica/jutarnja-kronika'
 PODCAST_SLUG = PATH_MAP.get(FEED_NAME, FEED_NAME)  # Now FEED_NAME is defined
-SAVE_DIR = pathlib.Path(__file__).resolve().parent.parent / 'feeds' / PODCAST_SLUG
+FEEDS_DIR = pathlib.Path(os.environ.get('FEEDS_DIR', pathlib.Path(__file__).resolve().parent.parent / 'feeds'))
+SAVE_DIR = FEEDS_DIR / PODCAST_SLUG
 FEED_FILE = SAVE_DIR / f"{FEED_NAME}.xml"
 PUBLIC_URL = f"https://{DOMAIN}/{PODCAST_SLUG}"  # Use PODCAST_SLUG directly
+STATE_DIR = pathlib.Path(os.environ.get('STATE_DIR', SAVE_DIR.parent / '.state'))  # Shared coordination state
+UPSTREAM_HOST = urlparse(BASE_URL).hostname
+EXIT_UPSTREAM_UNAVAILABLE = 75  # EX_TEMPFAIL: run.sh skips its own alert for this code
+EPISODE_STORE = STATE_DIR / f"{FEED_NAME}.episodes.json"  # Per-episode fingerprints
+PROFILE_DIR = pathlib.Path(__file__).resolve().parent.parent / 'logs' / 'profile'
 
 # Telegram settings
 TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN')
@@ -28,18 +48,40 @@ TELEGRAM_CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID')
 TELEGRAM_NOTIFICATIONS_ENABLED = os.environ.get('TELEGRAM_NOTIFICATIONS_ENABLED', 'true').lower() == 'true'
 TELEGRAM_NOTIFICATION_TYPES = os.environ.get('TELEGRAM_NOTIFICATION_TYPES', 'all').lower().split(',')
 
-# Create directory structure
-SAVE_DIR.mkdir(parents=True, exist_ok=True)
+# Feed lease; replaced in main() when LEASE_BACKEND enables multi-host coordination
+LEASE = NullLease()
+
+# WebSub/Podping pings sent after each feed write (no-op unless hubs are configured)
+PUBLISHER = Publisher()
+
+# Per-stage profiler; replaced in main() by --profile
+PROFILER = NullProfiler()
+
+# Heartbeat read by the container healthcheck (shared/health.py)
+RUN_STATUS = health.RunStatus(health.status_path(STATE_DIR, FEED_NAME))
+
+# Combined "all HRT news" feed this show is part of (shared/aggregate.py)
+AGGREGATE = Aggregate(feeds_dir=FEEDS_DIR, state_dir=STATE_DIR, max_episodes=MAX_EPISODES,
+                      log=logging.getLogger(PODCAST_NAME))
+
+# Landing page search over all shows (shared/search.py)
+SEARCH_INDEX = SearchIndex(FEEDS_DIR / 'search', STATE_DIR / 'search.json')
 
 # Enhanced logger - store logs in the main feeds directory, not in subfolder
 log = logging.getLogger(PODCAST_NAME)
 log.setLevel(logging.INFO)
-log_file_path = SAVE_DIR.parent / f'{PODCAST_NAME}.log'  # Store in /feeds/ not /feeds/jutarnja-kronika/
-h = TimedRotatingFileHandler(log_file_path, when='midnight',
-                             backupCount=7, encoding='utf-8')
-h.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s',
-                                 '%Y-%m-%d %H:%M:%S'))
-log.addHandler(h)
+
+def setup_output():
+    """Create the feed directories and the log file; called by main() once
+    the run's FEEDS_DIR is known to be the right one"""
+    SAVE_DIR.mkdir(parents=True, exist_ok=True)
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    log_file_path = SAVE_DIR.parent / f'{PODCAST_NAME}.log'  # Store in /feeds/ not /feeds/jutarnja-kronika/
+    h = TimedRotatingFileHandler(log_file_path, when='midnight',
+                                 backupCount=7, encoding='utf-8')
+    h.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s',
+                                     '%Y-%m-%d %H:%M:%S'))
+    log.addHandler(h)
 
 def send_telegram_notification(message, is_error=False):
     """Send notification to Telegram with enhanced control"""
@@ -108,44 +150,45 @@ def send_telegram_info(message):
     except Exception as e:
         log.error(f"Failed to send Telegram info notification: {e}")
 
+def upstream_transition(old_state, new_state, state):
+    """Circuit breaker callback: HRT going down or coming back are the only upstream alerts"""
+    log.warning(f"HRT circuit {old_state} -> {new_state}")
+    if old_state == 'closed' and new_state == 'open':
+        send_telegram_notification(
+            f"HRT unreachable ({state.get('last_error')}), polling paused; "
+            f"next probe in {int(state['cooldown'])}s", is_error=True)
+    elif new_state == 'closed':
+        send_telegram_notification("HRT reachable again, polling resumed")
+
 def fetch_html():
-    """Fetch HTML with retry logic"""
+    """Fetch HTML through the shared circuit breaker and rate limiter"""
     headers = {'User-Agent': 'Mozilla/5.0 (compatible; PodcastBot/1.0)'}
+    breaker = CircuitBreaker(UPSTREAM_HOST, STATE_DIR, on_transition=upstream_transition)
+    bucket = TokenBucket(UPSTREAM_HOST, STATE_DIR)
     
-    for attempt in range(3):
+    # Closed circuit: normal retries; half-open: a single cheap probe; open: raises CircuitOpen
+    attempts = breaker.allow()
+    for attempt in range(attempts):
+        bucket.take()
         try:
             response = requests.get(BASE_URL, headers=headers, timeout=15)
             response.raise_for_status()
-            return response.text
         except requests.RequestException as e:
             log.warning(f"Attempt {attempt + 1} failed: {e}")
-            if attempt == 2:  # Last attempt
+            if breaker.record_failure(e):
+                raise CircuitOpen(UPSTREAM_HOST, breaker.state()['open_until']) from e
+            if attempt == attempts - 1:  # Last attempt
                 raise
             time.sleep(5)  # Wait before retry
+        else:
+            breaker.record_success()
+            return response.text
 
-def parse_next(html):
-    """Parse episode data from HTML"""
-    try:
-        match = re.search(r'<script id="__NEXT_DATA__"[^>]*>(.*?)</script>', html, re.S)
-        if not match:
-            raise ValueError("Could not find __NEXT_DATA__ script tag")
-        
-        data = json.loads(match.group(1))
-        
-        # Navigate the data structure safely
-        episodes_data = data.get('props', {}).get('pageProps', {}).get('episodes', {}).get('data', {})
-        episodes = episodes_data.get('lastAvailableEpisodes', [])
-        
-        if not episodes:
-            raise ValueError("No episodes found in data")
-        parsed = [ep for ep in (parse_episode(e) for e in episodes) if ep]
-        if not parsed:
-            raise ValueError("No parseable episodes found")
-        mp3, title, desc, dt = max(parsed, key=lambda item: item[3].timestamp())
-        return mp3, title, desc, dt
-        
-    except (json.JSONDecodeError, KeyError, IndexError, ValueError) as e:
-        raise ValueError(f"Failed to parse episode data: {e}")
+def load_html(html_file=None):
+    """Fetch the show page from HRT, or read a saved copy for offline runs"""
+    if html_file:
+        return pathlib.Path(html_file).read_text(encoding='utf-8')
+    return fetch_html()
 
 def parse_episode(ep):
     audio_metadata = ep.get('audio', {}).get('metadata', [])
@@ -171,121 +214,189 @@ def extract_episode_datetime(ep, mp3):
     match = re.search(r'(20\d{12})', mp3 or '')
     if match:
         return datetime.strptime(match.group(1), "%Y%m%d%H%M%S").replace(tzinfo=timezone.utc)
-    return datetime.now(timezone.utc)
+    return None  # No date from HRT: EpisodeStore.fill_dates() keeps the first one we saw
 
-def latest_id():
-    """Get the ID of the latest episode in feed"""
-    if FEED_FILE.exists():
-        try:
-            feed = feedparser.parse(FEED_FILE)
-            if feed.entries:
-                return feed.entries[0].id
-        except Exception as e:
-            log.warning(f"Could not parse existing feed: {e}")
-    return None
-
-def update(mp3, title, desc, dt):
-    """Update feed with new episode"""
-    # Check if this episode already exists
-    existing_entries = []
-    if FEED_FILE.exists():
-        try:
-            existing_feed = feedparser.parse(FEED_FILE)
-            existing_entries = existing_feed.entries
-            # Check if this mp3 URL already exists
-            if any(entry.id == mp3 for entry in existing_entries):
-                log.info(f"Episode already exists: {title}")
-                return False  # No update needed
-        except Exception as e:
-            log.warning(f"Could not read existing feed: {e}")
+def write_feed(xml):
+    """Validate the rendered feed and atomically replace FEED_FILE"""
+    tmp_file = FEED_FILE.with_name(f".{FEED_FILE.name}.tmp")
+    tmp_file.write_bytes(xml)
+    report = validate_feed(tmp_file)
+    if not report.ok:
+        tmp_file.unlink(missing_ok=True)
+        raise ValueError(f"Generated feed failed validation: {'; '.join(report.errors)}")
+    for warning in report.warnings:
+        log.warning(f"Feed validation warning: {warning}")
+    # Fencing check: only the current lease holder may publish
+    try:
+        LEASE.verify()
+    except Exception:
+        tmp_file.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_file, FEED_FILE)
     
+    # Let hubs push the update instead of subscribers polling for it
+    PUBLISHER.publish(PUBLIC_URL)
+
+def artwork_urls(artwork_filename):
+    """Return (itunes, channel) image URLs, preferring pre-sized artwork variants"""
     try:
-        # Create new feed generator
-        fg = FeedGenerator()
-        fg.load_extension('podcast')
-        
-        # Set feed metadata
-        fg.title('Jutarnja kronika (Neslužbeno)')
-        fg.link(href=PUBLIC_URL, rel='self')
-        fg.description('Neslužbena RSS distribucija emisije Jutarnja kronika (HRT). Sadržaj je vlasništvo HRT-a.')
-        fg.language('hr')
-        fg.copyright('© Sadržaj: HRT | RSS distribucija: Neslužbena')
-        fg.category({'term': 'News', 'label': 'News'})
-        
-        # Artwork path - use logical naming (jutarnja-kronika.jpg, not jk.jpg)
-        artwork_filename = f"{PODCAST_SLUG}.jpg"  # jutarnja-kronika.jpg
-        fg.image(f"{PUBLIC_URL}/{artwork_filename}", 'Jutarnja kronika', PUBLIC_URL)
-        
-        # Set podcast-specific metadata
-        fg.podcast.itunes_author('HRT (Neslužbeno)')
-        fg.podcast.itunes_category('News')
-        fg.podcast.itunes_explicit('no')
-        fg.podcast.itunes_summary('Neslužbena RSS distribucija emisije Jutarnja kronika. Sadržaj je vlasništvo HRT-a, distribucija je neslužbena.')
-        fg.podcast.itunes_image(f"{PUBLIC_URL}/{artwork_filename}")
+        return publish_artwork(SAVE_DIR / artwork_filename, PUBLIC_URL, PODCAST_SLUG)
+    except Exception as e:
+        log.warning(f"Artwork variants unavailable, using {artwork_filename}: {e}")
+        return f"{PUBLIC_URL}/{artwork_filename}", f"{PUBLIC_URL}/{artwork_filename}"
+
+def build_feed():
+    """Create a feed generator with the channel metadata and no episodes"""
+    fg = FeedGenerator()
+    fg.load_extension('podcast')
+    
+    # Set feed metadata
+    fg.title('Jutarnja kronika (Neslužbeno)')
+    fg.link(href=PUBLIC_URL, rel='self')
+    fg.description('Neslužbena RSS distribucija emisije Jutarnja kronika (HRT). Sadržaj je vlasništvo HRT-a.')
+    fg.language('hr')
+    fg.copyright('© Sadržaj: HRT | RSS distribucija: Neslužbena')
+    fg.category({'term': 'News', 'label': 'News'})
+    
+    # Artwork path - use logical naming (jutarnja-kronika.jpg, not jk.jpg)
+    artwork_filename = f"{PODCAST_SLUG}.jpg"  # jutarnja-kronika.jpg
+    itunes_image, channel_image = artwork_urls(artwork_filename)
+    fg.image(channel_image, 'Jutarnja kronika', PUBLIC_URL, width=str(CHANNEL_IMAGE_SIZE), height=str(CHANNEL_IMAGE_SIZE))
+    
+    # Set podcast-specific metadata
+    fg.podcast.itunes_author('HRT (Neslužbeno)')
+    fg.podcast.itunes_category('News')
+    fg.podcast.itunes_explicit('no')
+    fg.podcast.itunes_summary('Neslužbena RSS distribucija emisije Jutarnja kronika. Sadržaj je vlasništvo HRT-a, distribucija je neslužbena.')
+    fg.podcast.itunes_image(itunes_image)
+    
+    # WebSub: <atom:link rel="hub"> for every configured hub
+    add_hubs(fg)
+    return fg
+
+def item_title(title, dt):
+    """Title of an episode's <item>; stored so the combined feed shows the same"""
+    return f"{title} (HRT)"
+
+def add_episode(fg, mp3, title, desc, dt):
+    """Add one scraped episode to the feed generator"""
+    fe = fg.add_entry()
+    fe.id(mp3)
+    fe.title(item_title(title, dt))
+    fe.description(f"{desc}\n\n---\nSadržaj: © HRT | Neslužbena RSS distribucija")
+    fe.enclosure(mp3, 0, 'audio/mpeg')
+    fe.pubDate(dt.astimezone(CRO_TZ))  # Use Croatian timezone
+    fe.podcast.itunes_author('HRT')
+    fe.podcast.itunes_explicit('no')
+
+def render_feed(episodes):
+    """Render the channel plus the given episodes, newest first"""
+    fg = build_feed()
+    for mp3, title, desc, dt in sorted(episodes, key=lambda x: x[3].timestamp(), reverse=True):
+        add_episode(fg, mp3, title, desc, dt)
+    
+    # Reverse entries to ensure newest-first order (feedgen sorts by pubDate ascending)
+    fg._FeedGenerator__feed_entries.reverse()
+    return fg.rss_str(pretty=True)
+
+def update(episodes):
+    """Patch the feed with new episodes and HRT's edits to existing ones.
+    
+    Returns (new, changed, rendered) episode lists; all empty means nothing
+    was written. rendered is everything re-rendered this run (untracked items
+    and new ones that missed the MAX_EPISODES cut included), for the search index.
+    """
+    with PROFILER.stage('parse'):
+        store = EpisodeStore(EPISODE_STORE)
+        existing = FEED_FILE.read_bytes() if FEED_FILE.exists() else None
         
-        # Add new episode first
-        fe = fg.add_entry()
-        fe.id(mp3)
-        fe.title(f"{title} (HRT)")
-        fe.description(f"{desc}\n\n---\nSadržaj: © HRT | Neslužbena RSS distribucija")
-        fe.enclosure(mp3, 0, 'audio/mpeg')
-        fe.pubDate(dt.astimezone(CRO_TZ))  # Use Croatian timezone
-        fe.podcast.itunes_author('HRT')
-        fe.podcast.itunes_explicit('no')
-
-        # Sort existing entries by date (newest first) and limit episodes
-        sorted_entries = sorted(
-            existing_entries[:MAX_EPISODES-1],
-            key=lambda e: date_parse.parse(e.published).timestamp(),
-            reverse=True
-        )
-        for entry in sorted_entries:
-            fe = fg.add_entry()
-            fe.id(entry.id)
-            fe.title(entry.title)
-            fe.description(entry.get('description', ''))
-            fe.enclosure(entry.enclosures[0].href if entry.enclosures else entry.id, 0, 'audio/mpeg')
-            entry_dt = date_parse.parse(entry.published)
-            fe.pubDate(entry_dt.astimezone(CRO_TZ))  # Use Croatian timezone
-            fe.podcast.itunes_author('HRT')
-            fe.podcast.itunes_explicit('no')
-
-        # Reverse entries to ensure newest-first order (feedgen sorts by pubDate ascending)
-        fg._FeedGenerator__feed_entries.reverse()
-
-        # Write the feed
-        fg.rss_file(str(FEED_FILE), pretty=True)
-        log.info(f'Added new episode: {title}')
-        return True  # Successfully updated
+        try:
+            feed_items = feed_item_dates(existing)
+        except Exception as e:
+            log.warning(f"Could not read existing feed, rebuilding it: {e}")
+            existing, feed_items = None, {}
         
+        new, changed, untracked = store.diff(episodes, feed_items, MAX_EPISODES)
+        rendered = new + changed + untracked
+    if not rendered:
+        return [], [], []
+    if untracked:
+        log.info(f"Fingerprinting {len(untracked)} existing episodes")
+    
+    try:
+        # Only new and edited items are rendered; the rest are copied from the published feed
+        with PROFILER.stage('render'):
+            xml, kept = merge_items(render_feed(rendered), existing, MAX_EPISODES)
+        with PROFILER.stage('write'):
+            write_feed(xml)
     except Exception as e:
         raise Exception(f"Failed to generate feed: {e}")
+    
+    store.update(rendered, kept, item_title)
+    store.save()
+    
+    # Episodes that did not make the MAX_EPISODES cut were not published
+    new = [ep for ep in new if ep[0] in kept]
+    for mp3, title, desc, dt in new:
+        log.info(f'Added new episode: {title}')
+    for mp3, title, desc, dt in changed:
+        log.info(f'Updated episode metadata: {title}')
+    return new, changed, rendered
+
+def extract_episodes(html):
+    """Pull the raw lastAvailableEpisodes list out of the page's __NEXT_DATA__"""
+    match = re.search(r'<script id="__NEXT_DATA__"[^>]*>(.*?)</script>', html, re.S)
+    if not match:
+        raise ValueError("Could not find __NEXT_DATA__ script tag")
+    
+    data = json.loads(match.group(1))
+    
+    # Navigate the data structure safely
+    episodes_data = data.get('props', {}).get('pageProps', {}).get('episodes', {}).get('data', {})
+    return episodes_data.get('lastAvailableEpisodes', [])
+
+def refresh_aggregate():
+    """Re-render the combined feed if this or another member feed changed"""
+    if FEED_NAME not in AGGREGATE.members:
+        return
+    try:
+        if AGGREGATE.refresh(lease=LEASE):
+            log.info(f"Combined feed {AGGREGATE.slug} updated")
+            PUBLISHER.publish(AGGREGATE.public_url)
+    except Exception as e:
+        # The show's own feed is already published; the combined one catches up next run
+        log.warning(f"Combined feed not updated: {e}")
+
+def index_episodes(episodes):
+    """Add this run's new or edited episodes to the search index"""
+    try:
+        with PROFILER.stage('index'):
+            added = SEARCH_INDEX.add(PODCAST_SLUG, episodes)
+        if added:
+            log.info(f"Indexed {added} episode(s) for search")
+    except Exception as e:
+        log.warning(f"Search index not updated: {e}")
 
 def parse_all_episodes(html):
     """Parse all available episodes from HTML"""
     try:
-        match = re.search(r'<script id="__NEXT_DATA__"[^>]*>(.*?)</script>', html, re.S)
-        if not match:
-            raise ValueError("Could not find __NEXT_DATA__ script tag")
-        
-        data = json.loads(match.group(1))
-        
-        # Navigate the data structure safely
-        episodes_data = data.get('props', {}).get('pageProps', {}).get('episodes', {}).get('data', {})
-        episodes = episodes_data.get('lastAvailableEpisodes', [])
+        with PROFILER.stage('extract'):
+            episodes = extract_episodes(html)
         
         if not episodes:
             raise ValueError("No episodes found in data")
         
         parsed_episodes = []
-        for ep in episodes:
-            try:
-                parsed = parse_episode(ep)
-                if parsed:
-                    parsed_episodes.append(parsed)
-            except Exception as e:
-                log.warning(f"Failed to parse episode: {e}")
-                continue
+        with PROFILER.stage('parse'):
+            for ep in episodes:
+                try:
+                    parsed = parse_episode(ep)
+                    if parsed:
+                        parsed_episodes.append(parsed)
+                except Exception as e:
+                    log.warning(f"Failed to parse episode: {e}")
+                    continue
+            parsed_episodes = EpisodeStore(EPISODE_STORE).fill_dates(parsed_episodes)
         return parsed_episodes
         
     except (json.JSONDecodeError, KeyError, IndexError, ValueError) as e:
@@ -297,57 +408,24 @@ def update_with_all_episodes(episodes):
         log.warning("No episodes provided for update")
         return False
     
+    # Sort episodes by date (newest first) and limit episodes if needed
+    episodes.sort(key=lambda x: x[3].timestamp(), reverse=True)
+    episodes_to_add = episodes[:MAX_EPISODES]
+    
     try:
-        # Create new feed generator
-        fg = FeedGenerator()
-        fg.load_extension('podcast')
-        
-        # Set feed metadata
-        fg.title('Jutarnja kronika (Neslužbeno)')
-        fg.link(href=PUBLIC_URL, rel='self')
-        fg.description('Neslužbena RSS distribucija emisije Jutarnja kronika (HRT). Sadržaj je vlasništvo HRT-a.')
-        fg.language('hr')
-        fg.copyright('© Sadržaj: HRT | RSS distribucija: Bruno')
-        fg.category({'term': 'News', 'label': 'News'})
-        
-        # Artwork path
-        artwork_filename = f"{PODCAST_SLUG}.jpg"  # jutarnja-kronika.jpg
-        fg.image(f"{PUBLIC_URL}/{artwork_filename}", 'Jutarnja kronika', PUBLIC_URL)
-        
-        # Set podcast-specific metadata
-        fg.podcast.itunes_author('HRT (Neslužbeno)')
-        fg.podcast.itunes_category('News')
-        fg.podcast.itunes_explicit('no')
-        fg.podcast.itunes_summary('Neslužbena RSS distribucija emisije Jutarnja kronika. Sadržaj je vlasništvo HRT-a, distribucija je neslužbena.')
-        fg.podcast.itunes_image(f"{PUBLIC_URL}/{artwork_filename}")
-        
-        # Sort episodes by date (newest first)
-        episodes.sort(key=lambda x: x[3].timestamp(), reverse=True)
-        
-        # Limit episodes if needed
-        episodes_to_add = episodes[:MAX_EPISODES]
-        
-        # Add all episodes
-        for mp3, title, desc, dt in episodes_to_add:
-            fe = fg.add_entry()
-            fe.id(mp3)
-            fe.title(f"{title} (HRT)")
-            fe.description(f"{desc}\n\n---\nSadržaj: © HRT | Neslužbena RSS distribucija")
-            fe.enclosure(mp3, 0, 'audio/mpeg')
-            fe.pubDate(dt.astimezone(CRO_TZ))  # Use Croatian timezone
-            fe.podcast.itunes_author('HRT')
-            fe.podcast.itunes_explicit('no')
-
-        # Reverse entries to ensure newest-first order (feedgen sorts by pubDate ascending)
-        fg._FeedGenerator__feed_entries.reverse()
-
-        # Write the feed
-        fg.rss_file(str(FEED_FILE), pretty=True)
-        log.info(f'Updated feed with {len(episodes_to_add)} episodes')
-        return True
-
+        with PROFILER.stage('render'):
+            xml = render_feed(episodes_to_add)
+        with PROFILER.stage('write'):
+            write_feed(xml)
     except Exception as e:
         raise Exception(f"Failed to generate feed: {e}")
+    
+    # Full rebuild: reset the fingerprints to exactly what was written
+    store = EpisodeStore(EPISODE_STORE)
+    store.update(episodes_to_add, [mp3 for mp3, title, desc, dt in episodes_to_add], item_title)
+    store.save()
+    log.info(f'Updated feed with {len(episodes_to_add)} episodes')
+    return True
 
 def main():
     """Main execution function"""
@@ -359,19 +437,50 @@ def main():
                        help='Fetch all available episodes instead of just checking for new ones')
     parser.add_argument('--quiet', action='store_true',
                        help='Suppress Telegram notifications (useful for manual runs)')
+    parser.add_argument('--profile', action='store_true',
+                       help='Profile each stage (cProfile + tracemalloc) and write results under logs/profile/')
+    parser.add_argument('--html-file', metavar='PATH',
+                       help='Offline run: read the show page from a saved HTML file instead of fetching it '
+                            'from HRT (needs FEEDS_DIR pointing at a scratch directory)')
     
     args = parser.parse_args()
     
+    # Offline runs (profiling, fixtures) must never touch live feeds or announce anything
+    offline = bool(args.html_file)
+    if offline and ('FEEDS_DIR' not in os.environ or 'STATE_DIR' in os.environ):
+        parser.error('--html-file needs FEEDS_DIR set to a scratch directory (and STATE_DIR unset)')
+    setup_output()
+    
     # Override telegram notifications if quiet mode
-    global send_telegram_notification
-    if args.quiet:
+    global send_telegram_notification, LEASE, PROFILER, PUBLISHER
+    if offline:
+        PUBLISHER = Publisher(hubs=[], podping_token=None)
+    if args.quiet or offline:
         def send_telegram_notification(message, is_error=False):
             pass  # Do nothing
     
+    if args.profile:
+        PROFILER = RunProfiler(PROFILE_DIR, FEED_NAME)
+    
+    if not offline:
+        RUN_STATUS.start()
+    outcome, error, new, episodes = health.OK, None, [], []
     try:
+        # Only the lease holder polls HRT; standby hosts wait for it to expire
+        LEASE = NullLease() if offline else open_lease(f"feed-{FEED_NAME}", STATE_DIR)
+        if not LEASE.acquire():
+            holder = LEASE.current() or {}
+            log.info(f"Standby: lease held by {holder.get('holder')} (token {holder.get('token')})")
+            outcome = health.STANDBY
+            return
+        LEASE.start_heartbeat()
+        if LEASE.holder:
+            log.info(f"Holding feed lease as {LEASE.holder} (token {LEASE.token})")
+
         if args.fetch_all:
             log.info("Starting full episode fetch...")
-            html = fetch_html()
+            with PROFILER.stage('fetch'):
+                html = load_html(args.html_file)
             episodes = parse_all_episodes(html)
             
             log.info(f"Found {len(episodes)} episodes on the website")
@@ -381,37 +490,67 @@ def main():
                 if updated:
                     send_telegram_notification(f"Feed refreshed with {len(episodes)} episodes")
                     log.info("Feed updated with all episodes successfully")
+                    refresh_aggregate()
+                    index_episodes(episodes)
                 else:
                     log.info("Failed to update feed")
+                    outcome, error = health.ERROR, "Failed to update feed"
             else:
                 log.warning("No episodes found to add")
         else:
             log.info("Starting feed update check...")
             
             # Fetch and parse data
-            html = fetch_html()
-            mp3, title, desc, dt = parse_next(html)
+            with PROFILER.stage('fetch'):
+                html = load_html(args.html_file)
+            episodes = parse_all_episodes(html)
             
-            log.info(f"Found episode: {title}")
+            log.info(f"Found {len(episodes)} episodes on the website")
             
-            # Check if update is needed
-            current_latest = latest_id()
-            if mp3 != current_latest:
-                updated = update(mp3, title, desc, dt)
-                if updated:
+            # Diff against stored fingerprints; only new or edited items are re-rendered
+            new, changed, rendered = update(episodes)
+            if new:
+                mp3, title, desc, dt = max(new, key=lambda x: x[3].timestamp())
+                if len(new) == 1:
                     send_telegram_notification(f"New episode added: {title}")
-                    log.info("Feed updated successfully")
                 else:
-                    log.info("Episode already exists, no update needed")
+                    send_telegram_notification(f"{len(new)} new episodes added, latest: {title}")
+            if changed:
+                send_telegram_info(f"HRT updated {len(changed)} episode(s): " +
+                                   ', '.join(title for mp3, title, desc, dt in changed))
+            if new or changed:
+                log.info("Feed updated successfully")
             else:
                 log.info("No new episodes found")
+            refresh_aggregate()
+            index_episodes(rendered)
             
+    except (CircuitOpen, RateLimited) as e:
+        # Upstream outage: the breaker already alerted on the state change
+        log.warning(f"Skipping run: {e}")
+        outcome, error = health.UPSTREAM_UNAVAILABLE, str(e)
+        sys.exit(EXIT_UPSTREAM_UNAVAILABLE)
     except Exception as e:
         error_msg = f"Script failed: {str(e)}"
         log.error(error_msg)
         log.error(f"Traceback: {traceback.format_exc()}")
         send_telegram_notification(error_msg, is_error=True)
+        outcome, error = health.ERROR, str(e)
         sys.exit(1)
+    finally:
+        if not offline:
+            newest = max((dt for mp3, title, desc, dt in episodes), default=None)
+            RUN_STATUS.finish(outcome, error, new_episodes=len(new), newest_episode=newest)
+        for target, error in PUBLISHER.wait():
+            if error:
+                log.warning(f"Publish ping to {target} failed: {error}")
+            else:
+                log.info(f"Publish ping sent to {target}")
+        LEASE.stop_heartbeat()
+        if args.profile:
+            summary = PROFILER.write()
+            log.info(f"Profile written to {PROFILER.out_dir}")
+            print(summary)
 
 if __name__ == '__main__':
     main()
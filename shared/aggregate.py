@@ -0,0 +1,195 @@
+"""Combined "all HRT news" feed built from the member feeds' episode stores.
+
+Every member feed keeps its episodes in STATE_DIR/<feed>.episodes.json as
+(mp3, title, desc, dt) data, newest first. The combined feed streams those
+lists through a heap-based k-way merge (heapq.merge), keeps the newest
+MAX_EPISODES and renders them; nothing is re-sorted and no member XML is
+parsed. Items keep the title their own feed gave them (stored as item_title
+by the member), so an episode reads the same in both feeds. A signature of
+each member store is remembered, so the combined feed is only rendered again
+when a member actually changed.
+
+Member feeds call refresh() after their own run, passing their feed lease:
+like the member feeds, the combined feed is only replaced after a fencing
+check, so a deposed leader cannot overwrite it. `python3 aggregate.py` does
+the same by hand (--force renders even if nothing changed).
+
+Settings:
+  AGGREGATE_FEEDS  comma-separated member feed names (default v,jk; empty
+                   disables the combined feed)
+  AGGREGATE_NAME   feed name of the combined feed, used for its XML and state
+                   files (default all)
+  AGGREGATE_SLUG   public path of the combined feed (default hrt-vijesti)
+"""
+import os, sys, time, heapq, shutil, hashlib, logging, pathlib, argparse
+from itertools import islice
+from zoneinfo import ZoneInfo
+from feedgen.feed import FeedGenerator
+
+from statefile import locked_json
+from lease import NullLease
+from episodes import EpisodeStore
+from feed_validator import validate_feed
+from websub import add_hubs
+from artwork import CHANNEL_IMAGE_SIZE, publish_artwork
+
+DOMAIN = os.environ.get('DOMAIN', 'localhost')
+MAX_EPISODES = int(os.environ.get('MAX_EPISODES', '30'))
+FEEDS_DIR = pathlib.Path(os.environ.get('FEEDS_DIR', pathlib.Path(__file__).resolve().parent.parent / 'feeds'))
+STATE_DIR = pathlib.Path(os.environ.get('STATE_DIR', FEEDS_DIR / '.state'))
+AGGREGATE_FEEDS = [name.strip() for name in os.environ.get('AGGREGATE_FEEDS', 'v,jk').split(',') if name.strip()]
+AGGREGATE_NAME = os.environ.get('AGGREGATE_NAME', 'all')
+AGGREGATE_SLUG = os.environ.get('AGGREGATE_SLUG', 'hrt-vijesti')
+CRO_TZ = ZoneInfo("Europe/Zagreb")
+
+# Public slug of each member feed, for its artwork
+MEMBER_SLUGS = {'v': 'vijesti', 'jk': 'jutarnja-kronika'}
+
+
+def store_signature(store):
+    """Hash of a member store's episode fingerprints, in feed order"""
+    payload = '\n'.join(f"{mp3} {data['fp']}" for mp3, data in store.episodes.items())
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def merge_newest(streams, limit):
+    """K-way merge of newest-first episode streams, keeping the first `limit`.
+
+    An episode listed by more than one member is kept once.
+    """
+    seen = set()
+    merged = heapq.merge(*streams, key=lambda episode: episode[3], reverse=True)
+    unique = (episode for episode in merged if not (episode[0] in seen or seen.add(episode[0])))
+    return list(islice(unique, limit))
+
+
+def published_episodes(store):
+    """A member store's episodes, newest first, titled as in the member's feed"""
+    return [(mp3, store.episodes[mp3].get('item_title') or f"{title} (HRT)", desc, dt)
+            for mp3, title, desc, dt in store.newest_first()]
+
+
+class Aggregate:
+    """The combined feed of several member feeds, logging to the given logger
+    (the member feed's own when refreshed from a scraper run)"""
+
+    def __init__(self, members=None, name=AGGREGATE_NAME, slug=AGGREGATE_SLUG,
+                 feeds_dir=FEEDS_DIR, state_dir=STATE_DIR, max_episodes=MAX_EPISODES, log=None):
+        self.members = AGGREGATE_FEEDS if members is None else members
+        self.name = name
+        self.slug = slug
+        self.save_dir = pathlib.Path(feeds_dir) / slug
+        self.feed_file = self.save_dir / f"{name}.xml"
+        self.state_dir = pathlib.Path(state_dir)
+        self.max_episodes = max_episodes
+        self.public_url = f"https://{DOMAIN}/{slug}"
+        self.log = log or logging.getLogger(__name__)
+
+    def refresh(self, force=False, lease=None):
+        """Render the combined feed if a member changed; returns True if written.
+
+        lease is the caller's feed lease, verified just before the feed is
+        replaced (raises LeaseLost if it is no longer held).
+        """
+        if not self.members:
+            return False
+        with locked_json(self.state_dir / f"{self.name}.aggregate.json", {}) as (state, write):
+            stores = [EpisodeStore(self.state_dir / f"{member}.episodes.json") for member in self.members]
+            signatures = {member: store_signature(store) for member, store in zip(self.members, stores)}
+            if not force and state.get('members') == signatures and self.feed_file.exists():
+                return False
+
+            episodes = merge_newest([published_episodes(store) for store in stores], self.max_episodes)
+            self.write(self.render(episodes), lease or NullLease())
+            write({'members': signatures, 'episodes': len(episodes), 'updated': time.time()})
+            self.log.info(f"Combined feed {self.slug} rendered with {len(episodes)} episodes")
+            return True
+
+    def artwork_urls(self):
+        """Artwork variants of the combined feed, seeded from the first member's image"""
+        source = self.save_dir / f"{self.slug}.jpg"
+        try:
+            if not source.exists():
+                member_slug = MEMBER_SLUGS.get(self.members[0], self.members[0])
+                self.save_dir.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(self.save_dir.parent / member_slug / f"{member_slug}.jpg", source)
+            return publish_artwork(source, self.public_url, self.slug)
+        except Exception as e:
+            self.log.warning(f"Artwork variants unavailable for {self.slug}: {e}")
+            return f"{self.public_url}/{self.slug}.jpg", f"{self.public_url}/{self.slug}.jpg"
+
+    def render(self, episodes):
+        """RSS for the given newest-first episodes"""
+        fg = FeedGenerator()
+        fg.load_extension('podcast')
+        fg.title('HRT vijesti (Neslužbeno)')
+        fg.link(href=self.public_url, rel='self')
+        fg.description('Neslužbena RSS distribucija svih informativnih emisija HRT-a na jednom mjestu: '
+                       'Vijesti, Jutarnja kronika i ostale emisije, od najnovije prema starijima.')
+        fg.language('hr')
+        fg.copyright('© Sadržaj: HRT | RSS distribucija: Neslužbena')
+        fg.category({'term': 'News', 'label': 'News'})
+
+        itunes_image, channel_image = self.artwork_urls()
+        fg.image(channel_image, 'HRT vijesti', self.public_url,
+                 width=str(CHANNEL_IMAGE_SIZE), height=str(CHANNEL_IMAGE_SIZE))
+
+        fg.podcast.itunes_author('HRT (Neslužbeno)')
+        fg.podcast.itunes_category('News')
+        fg.podcast.itunes_explicit('no')
+        fg.podcast.itunes_summary('Sve informativne emisije HRT-a u jednom feedu. Sadržaj je vlasništvo HRT-a, '
+                                  'distribucija je neslužbena.')
+        fg.podcast.itunes_image(itunes_image)
+        add_hubs(fg)
+
+        for mp3, title, desc, dt in episodes:
+            local = dt.astimezone(CRO_TZ)
+            fe = fg.add_entry()
+            fe.id(mp3)
+            fe.title(title)
+            fe.description(f"{desc}\n\n---\nSadržaj: © HRT | Neslužbena RSS distribucija")
+            fe.enclosure(mp3, 0, 'audio/mpeg')
+            fe.pubDate(local)
+            fe.podcast.itunes_author('HRT')
+            fe.podcast.itunes_explicit('no')
+
+        # add_entry() prepends; restore newest-first order
+        fg._FeedGenerator__feed_entries.reverse()
+        return fg.rss_str(pretty=True)
+
+    def write(self, xml, lease):
+        """Validate and atomically replace the combined feed, if lease is still held"""
+        self.save_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.feed_file.with_name(f".{self.feed_file.name}.tmp")
+        tmp_file.write_bytes(xml)
+        report = validate_feed(tmp_file)
+        if not report.ok:
+            tmp_file.unlink(missing_ok=True)
+            raise ValueError(f"Combined feed failed validation: {'; '.join(report.errors)}")
+        # Fencing check: only the current lease holder may publish
+        try:
+            lease.verify()
+        except Exception:
+            tmp_file.unlink(missing_ok=True)
+            raise
+        os.replace(tmp_file, self.feed_file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render the combined feed from the member feeds')
+    parser.add_argument('--force', action='store_true', help='Render even if no member changed')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    aggregate = Aggregate()
+    if not aggregate.members:
+        print("Combined feed disabled (AGGREGATE_FEEDS is empty)")
+    elif aggregate.refresh(force=args.force):
+        print(f"✅ {aggregate.feed_file} updated")
+    else:
+        print(f"✅ {aggregate.feed_file} is up to date")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
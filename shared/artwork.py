@@ -0,0 +1,132 @@
+"""Pre-sized podcast artwork generated when a feed is published.
+
+From the show's source image (feeds/<slug>/<slug>.jpg) this builds square,
+progressive JPEG and WebP variants at the sizes podcast directories ask for,
+with content-hashed filenames so nginx can cache them forever. Work is only
+done when the source file changes; the result is described by
+feeds/<slug>/artwork/manifest.json, which both the feed generator and the
+landing page read.
+
+Pillow is optional: without it publish_artwork() falls back to the raw
+source image.
+"""
+import io, hashlib, pathlib
+
+from statefile import read_json, write_json
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - exercised only without Pillow
+    Image = None
+
+ARTWORK_SIZES = (3000, 1400, 600, 300, 144)
+MIN_SPEC_SIZE = 1400   # Apple Podcasts: square, 1400-3000 px
+CHANNEL_IMAGE_SIZE = 144  # RSS 2.0 caps the channel <image> at 144 px wide
+FORMATS = {
+    'jpeg': ('jpg', {'format': 'JPEG', 'quality': 85, 'optimize': True, 'progressive': True}),
+    'webp': ('webp', {'format': 'WEBP', 'quality': 80, 'method': 6}),
+}
+
+
+def _square(image):
+    """Center-crop to a square"""
+    width, height = image.size
+    side = min(width, height)
+    left, top = (width - side) // 2, (height - side) // 2
+    return image.crop((left, top, left + side, top + side))
+
+
+def _target_sizes(side, sizes):
+    # Never upscale beyond what the spec requires; a 3000 px copy of a
+    # 1080 px source only costs bytes
+    limit = max(side, MIN_SPEC_SIZE)
+    return [size for size in sizes if size <= limit]
+
+
+def build_variants(source, out_dir, name, sizes=ARTWORK_SIZES):
+    """Create artwork variants for source if it changed; returns the manifest"""
+    source = pathlib.Path(source)
+    out_dir = pathlib.Path(out_dir)
+    manifest_path = out_dir / 'manifest.json'
+    manifest = read_json(manifest_path)
+
+    stat = source.stat()
+    # A manifest built for other sizes (an older ARTWORK_SIZES) is rebuilt
+    current = manifest and manifest.get('sizes') == list(sizes) and \
+        all((out_dir / f).exists() for f in _files(manifest))
+    if current and manifest.get('mtime') == stat.st_mtime and manifest.get('bytes') == stat.st_size:
+        return manifest
+
+    data = source.read_bytes()
+    source_hash = hashlib.sha256(data).hexdigest()
+    if current and manifest.get('source') == source_hash:
+        # Touched but unchanged: just remember the new mtime
+        manifest.update(mtime=stat.st_mtime, bytes=stat.st_size)
+        write_json(manifest_path, manifest)
+        return manifest
+
+    if Image is None:
+        raise RuntimeError("Pillow is not installed")
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with Image.open(io.BytesIO(data)) as image:
+        square = _square(image.convert('RGB'))
+
+    variants = {fmt: {} for fmt in FORMATS}
+    for size in _target_sizes(square.size[0], sizes):
+        resized = square if square.size[0] == size else square.resize((size, size), Image.LANCZOS)
+        for fmt, (extension, options) in FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, **options)
+            encoded = buffer.getvalue()
+            filename = f"{name}-{size}.{hashlib.sha256(encoded).hexdigest()[:10]}.{extension}"
+            target = out_dir / filename
+            if not target.exists():
+                target.write_bytes(encoded)
+            variants[fmt][str(size)] = filename
+
+    new_manifest = {'source': source_hash, 'mtime': stat.st_mtime, 'bytes': stat.st_size,
+                    'sizes': list(sizes), 'variants': variants}
+    write_json(manifest_path, new_manifest)
+
+    # Keep the previous generation: feeds published before this run still point at it
+    keep = set(_files(new_manifest)) | set(_files(manifest or {}))
+    for path in out_dir.glob(f"{name}-*"):
+        if path.name not in keep:
+            path.unlink()
+    return new_manifest
+
+
+def _files(manifest):
+    return [f for files in manifest.get('variants', {}).values() for f in files.values()]
+
+
+def pick(manifest, fmt, size):
+    """Filename of the smallest variant at least `size` px, else the largest one"""
+    files = manifest['variants'][fmt]
+    sizes = sorted(int(s) for s in files)
+    chosen = next((s for s in sizes if s >= size), sizes[-1])
+    return files[str(chosen)]
+
+
+def pick_at_most(manifest, fmt, size):
+    """Filename of the largest variant no wider than `size` px"""
+    files = manifest['variants'][fmt]
+    fitting = [int(s) for s in files if int(s) <= size]
+    if not fitting:
+        raise ValueError(f"No {fmt} artwork variant of at most {size} px")
+    return files[str(max(fitting))]
+
+
+def publish_artwork(source, public_url, name):
+    """Return (itunes_image_url, channel_image_url) for the feed.
+
+    The iTunes image is the largest JPEG variant (3000 or 1400 px); the RSS
+    <image> uses one of at most CHANNEL_IMAGE_SIZE px, as RSS 2.0 requires.
+    Raises if variants cannot be produced so the caller can fall back.
+    """
+    source = pathlib.Path(source)
+    manifest = build_variants(source, source.parent / 'artwork', name)
+    largest = pick(manifest, 'jpeg', ARTWORK_SIZES[0])
+    small = pick_at_most(manifest, 'jpeg', CHANNEL_IMAGE_SIZE)
+    return f"{public_url}/artwork/{largest}", f"{public_url}/artwork/{small}"
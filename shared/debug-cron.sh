@@ -47,6 +47,9 @@ ls -la /app/scripts/ >> $LOG_FILE 2>&1
 echo -e "\nCrontab contents:" >> $LOG_FILE
 crontab -l >> $LOG_FILE 2>&1
 
+echo -e "\nFeed health:" >> $LOG_FILE
+python3 /app/shared/health.py >> $LOG_FILE 2>&1
+
 echo -e "\nActive processes:" >> $LOG_FILE
 ps aux | grep -E "(cron|python)" >> $LOG_FILE
 
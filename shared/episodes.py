@@ -0,0 +1,149 @@
+"""Per-episode fingerprints and in-place feed patching.
+
+Each poll compares the scraped episodes with the fingerprints stored for the
+items already in the feed. Only new episodes and episodes whose metadata HRT
+has edited since are rendered again; every other <item> is carried over from
+the published feed untouched.
+"""
+import hashlib, json
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from lxml import etree
+
+from statefile import read_json, write_json
+
+
+def fingerprint(mp3, title, desc, dt):
+    """Stable hash of everything that ends up in an episode's <item>"""
+    payload = json.dumps([mp3, title, desc, dt.isoformat()], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _item_guid(item):
+    return (item.findtext('guid') or '').strip()
+
+
+def _item_date(item):
+    try:
+        return parsedate_to_datetime(item.findtext('pubDate') or '')
+    except (TypeError, ValueError):
+        return None
+
+
+def feed_item_dates(xml):
+    """Map guid -> pubDate for every <item> in a rendered feed"""
+    if not xml:
+        return {}
+    channel = etree.fromstring(xml).find('channel')
+    return {_item_guid(item): _item_date(item) for item in channel.iter('item')}
+
+
+def merge_items(rendered, existing, max_items):
+    """Graft freshly rendered items onto the published feed.
+
+    `rendered` is a complete feed holding the current channel metadata and only
+    the items that had to be (re-)rendered; `existing` is the published feed or
+    None. Rendered items replace published ones with the same guid, the rest are
+    kept as-is. Returns (xml, kept_guids) with items newest-first, capped at
+    max_items.
+    """
+    parser = etree.XMLParser(remove_blank_text=True)
+    root = etree.fromstring(rendered, parser)
+    channel = root.find('channel')
+    items = channel.findall('item')
+    patched = {_item_guid(item) for item in items}
+
+    if existing:
+        for item in etree.fromstring(existing, parser).find('channel').iter('item'):
+            if _item_guid(item) not in patched:
+                items.append(item)
+
+    for item in channel.findall('item'):
+        channel.remove(item)
+    undated = datetime.min.replace(tzinfo=timezone.utc)
+    items.sort(key=lambda item: _item_date(item) or undated, reverse=True)
+    items = items[:max_items]
+    channel.extend(items)
+    etree.cleanup_namespaces(root)
+
+    xml = etree.tostring(root, xml_declaration=True, encoding='UTF-8', pretty_print=True)
+    return xml, [_item_guid(item) for item in items]
+
+
+class EpisodeStore:
+    """Fingerprints and source data of the episodes currently in a feed"""
+
+    def __init__(self, path):
+        self.path = path
+        self.episodes = read_json(path, {}).get('episodes', {})
+
+    def fill_dates(self, episodes, now=None):
+        """Date episodes HRT lists without a broadcast time (dt is None).
+
+        A known episode keeps the date it was first published with, so a
+        missing date can never make it look edited; new ones get `now`.
+        """
+        now = now or datetime.now(timezone.utc)
+        filled = []
+        for mp3, title, desc, dt in episodes:
+            if dt is None:
+                stored = self.episodes.get(mp3)
+                dt = datetime.fromisoformat(stored['dt']) if stored else now
+            filled.append((mp3, title, desc, dt))
+        return filled
+
+    def diff(self, episodes, feed_items, max_items):
+        """Split scraped episodes into (new, changed, untracked) lists.
+
+        new        not in the feed yet and recent enough to make the cut
+        changed    in the feed, but HRT edited title/description/time since
+        untracked  in the feed without a stored fingerprint (first run after
+                   upgrading); rendered once so the store can take over
+        """
+        oldest = None
+        if len(feed_items) >= max_items:
+            dates = [dt for dt in feed_items.values() if dt]
+            oldest = min(dates) if dates else None
+
+        new, changed, untracked = [], [], []
+        for episode in episodes:
+            mp3, title, desc, dt = episode
+            if mp3 in feed_items:
+                stored = self.episodes.get(mp3)
+                if stored is None:
+                    untracked.append(episode)
+                elif stored['fp'] != fingerprint(*episode):
+                    changed.append(episode)
+            elif oldest is None or dt > oldest:
+                new.append(episode)
+        return new, changed, untracked
+
+    def update(self, episodes, keep, item_title=None):
+        """Record rendered episodes and forget those no longer in the feed.
+
+        item_title(title, dt) is the feed's own <item> title formatting; its
+        result is stored so readers such as the combined feed can reuse it.
+        """
+        for mp3, title, desc, dt in episodes:
+            self.episodes[mp3] = {'fp': fingerprint(mp3, title, desc, dt),
+                                  'title': title, 'desc': desc, 'dt': dt.isoformat()}
+            if item_title:
+                self.episodes[mp3]['item_title'] = item_title(title, dt)
+        keep = set(keep)
+        # Stored newest first, so readers such as the combined feed can merge
+        # stores without sorting them again
+        kept = [(mp3, data) for mp3, data in self.episodes.items() if mp3 in keep]
+        kept.sort(key=lambda item: datetime.fromisoformat(item[1]['dt']), reverse=True)
+        self.episodes = dict(kept)
+
+    def newest_first(self):
+        """Stored episodes as (mp3, title, desc, dt) tuples, newest first"""
+        episodes = [(mp3, data['title'], data['desc'], datetime.fromisoformat(data['dt']))
+                    for mp3, data in self.episodes.items()]
+        if any(a[3] < b[3] for a, b in zip(episodes, episodes[1:])):
+            # Written before stores were kept in order; fixed on the next update()
+            episodes.sort(key=lambda episode: episode[3], reverse=True)
+        return episodes
+
+    def save(self):
+        write_json(self.path, {'episodes': self.episodes})
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Streaming podcast feed validator.
+
+Used as the CI check (tests/test_scraper.py) and as the pre-publish gate in
+scripts_*/feed.py. Feeds are read with iterparse and every <item> is dropped
+as soon as it has been checked, so memory stays flat on large archives.
+"""
+import os, sys, glob
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from email.utils import parsedate_to_datetime
+
+ITUNES_NS = 'http://www.itunes.com/dtds/podcast-1.0.dtd'
+MAX_FEED_BYTES = int(os.environ.get('MAX_FEED_BYTES', str(512 * 1024)))
+
+# Channel elements every podcast directory expects
+REQUIRED_CHANNEL_TAGS = ('title', 'link', 'description', 'language')
+REQUIRED_ITUNES_TAGS = ('image', 'category', 'explicit')
+EXPLICIT_VALUES = ('yes', 'no', 'true', 'false', 'clean')
+
+
+class FeedReport(namedtuple('FeedReport', 'path items size errors warnings')):
+    """Result of validating a single feed file"""
+
+    @property
+    def ok(self):
+        return not self.errors
+
+
+def _itunes(name):
+    return f'{{{ITUNES_NS}}}{name}'
+
+
+def _parse_pubdate(text):
+    try:
+        dt = parsedate_to_datetime(text)
+    except (TypeError, ValueError):
+        return None
+    if dt is None or dt.tzinfo is None:
+        return None
+    return dt
+
+
+def _check_item(item, index, guids, last_dt, errors):
+    """Check one <item>; returns its pubDate so the caller can track ordering"""
+    label = f"item {index}"
+
+    guid = (item.findtext('guid') or '').strip()
+    if not guid:
+        errors.append(f"{label}: missing <guid>")
+    elif guid in guids:
+        errors.append(f"{label}: duplicate guid {guid}")
+    else:
+        guids.add(guid)
+        label = f"item {index} ({guid})"
+
+    if not (item.findtext('title') or '').strip():
+        errors.append(f"{label}: missing <title>")
+
+    enclosure = item.find('enclosure')
+    if enclosure is None:
+        errors.append(f"{label}: missing <enclosure>")
+    else:
+        url = enclosure.get('url', '')
+        if not url.startswith(('http://', 'https://')):
+            errors.append(f"{label}: enclosure url is not http(s): {url!r}")
+        if not enclosure.get('type', '').startswith(('audio/', 'video/')):
+            errors.append(f"{label}: enclosure type is not audio/video: {enclosure.get('type')!r}")
+        if not enclosure.get('length', '').isdigit():
+            errors.append(f"{label}: enclosure length is not a byte count: {enclosure.get('length')!r}")
+
+    explicit = item.findtext(_itunes('explicit'))
+    if explicit is not None and explicit.strip().lower() not in EXPLICIT_VALUES:
+        errors.append(f"{label}: invalid itunes:explicit {explicit!r}")
+
+    pub_text = item.findtext('pubDate')
+    if pub_text is None:
+        errors.append(f"{label}: missing <pubDate>")
+        return last_dt
+    dt = _parse_pubdate(pub_text)
+    if dt is None:
+        errors.append(f"{label}: unparseable pubDate {pub_text!r}")
+        return last_dt
+    if last_dt is not None and dt > last_dt:
+        errors.append(f"{label}: pubDate {pub_text} is newer than the previous item (feed must be newest-first)")
+    return dt
+
+
+def validate_feed(path, max_bytes=MAX_FEED_BYTES):
+    """Validate a single feed file and return a FeedReport"""
+    path = str(path)
+    errors, warnings = [], []
+    items = 0
+
+    try:
+        size = os.path.getsize(path)
+    except OSError as e:
+        return FeedReport(path, 0, 0, [f"cannot read file: {e}"], [])
+    if max_bytes and size > max_bytes:
+        errors.append(f"feed is {size} bytes, limit is {max_bytes}")
+
+    depth = 0
+    channel = None
+    channel_tags = set()
+    guids = set()
+    last_dt = None
+
+    try:
+        for event, elem in ET.iterparse(path, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                if depth == 1 and elem.tag.lower() != 'rss':
+                    errors.append(f"root tag is not <rss> (got {elem.tag})")
+                    return FeedReport(path, items, size, errors, warnings)
+                if depth == 2 and elem.tag == 'channel':
+                    channel = elem
+                continue
+
+            if depth == 3 and channel is not None:
+                if elem.tag == 'item':
+                    items += 1
+                    last_dt = _check_item(elem, items, guids, last_dt, errors)
+                    # Drop the checked item so memory does not grow with the archive
+                    channel.remove(elem)
+                else:
+                    channel_tags.add(elem.tag)
+                    if elem.tag == _itunes('image') and not elem.get('href'):
+                        errors.append("itunes:image has no href")
+                    elif elem.tag == _itunes('category') and not elem.get('text'):
+                        errors.append("itunes:category has no text")
+                    elif elem.tag == _itunes('explicit') and \
+                            (elem.text or '').strip().lower() not in EXPLICIT_VALUES:
+                        errors.append(f"invalid channel itunes:explicit {elem.text!r}")
+            depth -= 1
+    except ET.ParseError as e:
+        errors.append(f"XML parse error: {e}")
+        return FeedReport(path, items, size, errors, warnings)
+
+    if channel is None:
+        errors.append("no <channel> element found")
+        return FeedReport(path, items, size, errors, warnings)
+
+    for tag in REQUIRED_CHANNEL_TAGS:
+        if tag not in channel_tags:
+            errors.append(f"channel is missing <{tag}>")
+    for tag in REQUIRED_ITUNES_TAGS:
+        if _itunes(tag) not in channel_tags:
+            errors.append(f"channel is missing <itunes:{tag}>")
+    if _itunes('author') not in channel_tags:
+        warnings.append("channel has no <itunes:author>")
+    if items == 0:
+        errors.append("no <item> entries found")
+
+    return FeedReport(path, items, size, errors, warnings)
+
+
+def validate_feeds(paths, workers=None, max_bytes=MAX_FEED_BYTES):
+    """Validate several feeds across a process pool, preserving input order"""
+    paths = [str(p) for p in paths]
+    if workers == 1 or len(paths) < 2:
+        return [validate_feed(p, max_bytes) for p in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(validate_feed, paths, [max_bytes] * len(paths)))
+
+
+def print_report(report):
+    """Print a report in the ✅/❌ format the CI summary greps for"""
+    if report.ok:
+        print(f"✅ {report.path} OK ({report.items} items, {report.size} bytes)")
+    else:
+        for error in report.errors:
+            print(f"❌ {report.path}: {error}")
+    for warning in report.warnings:
+        print(f"⚠️  {report.path}: {warning}")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Validate podcast RSS feeds')
+    parser.add_argument('paths', nargs='*', help='Feed files (default: feeds/*/*.xml)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--max-bytes', type=int, default=MAX_FEED_BYTES,
+                        help='Maximum allowed feed size in bytes (0 disables the check)')
+    args = parser.parse_args(argv)
+
+    paths = args.paths or sorted(glob.glob('feeds/*/*.xml'))
+    if not paths:
+        print("❌ No feeds/*/*.xml files found")
+        return 1
+
+    reports = validate_feeds(paths, workers=args.workers, max_bytes=args.max_bytes)
+    for report in reports:
+        print_report(report)
+    return 0 if all(r.ok for r in reports) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
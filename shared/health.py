@@ -0,0 +1,218 @@
+"""Run heartbeat and container healthcheck for a feed.
+
+Every scraper run records its outcome in STATE_DIR/<feed>.<holder>.status.json,
+one file per host (holder is LEASE_HOLDER, the hostname by default), so a
+standby host can never vouch for a failing leader:
+
+  last_attempt      when the latest run started
+  last_success      when a run last finished cleanly
+  last_standby      when a run last stood by because another host holds
+                    the lease
+  last_new_episode  when a run last added an episode to the feed
+  newest_episode    broadcast time of the newest episode HRT listed
+  duration          seconds the latest run took
+  outcome / error   ok, standby, upstream_unavailable or error, with message
+  running           true while a run is in progress
+
+`python3 health.py` is the container healthcheck. Thresholds follow each
+show's cadence instead of a fixed age:
+
+  - runs: the crontab says when cron should have fired; the feed is unhealthy
+    once HEALTH_MISSED_RUNS scheduled runs have passed without an attempt, or
+    without a success (standby runs count, unless this host is the leader:
+    it holds the lease, or nobody does and its latest run scraped)
+  - episodes: the largest gap between stored episodes is the show's normal
+    quiet period (nights, weekends); the newest episode may be at most
+    HEALTH_EPISODE_SLACK times that old
+
+Exit status 0 means healthy, 1 unhealthy.
+"""
+import os, sys, time, pathlib, argparse
+from datetime import datetime, timedelta
+
+from statefile import locked_json, read_json
+from episodes import EpisodeStore
+from lease import LEASE_HOLDER, open_lease
+
+FEEDS_DIR = pathlib.Path(os.environ.get('FEEDS_DIR', pathlib.Path(__file__).resolve().parent.parent / 'feeds'))
+STATE_DIR = pathlib.Path(os.environ.get('STATE_DIR', FEEDS_DIR / '.state'))
+CRONTAB = pathlib.Path(__file__).resolve().parent.parent / 'scripts' / 'crontab'
+HEALTH_MISSED_RUNS = int(os.environ.get('HEALTH_MISSED_RUNS', '3'))
+HEALTH_EPISODE_SLACK = float(os.environ.get('HEALTH_EPISODE_SLACK', '1.5'))
+RUN_TIMEOUT = 600  # run.sh kills a run after at most this long
+
+OK, STANDBY, UPSTREAM_UNAVAILABLE, ERROR = 'ok', 'standby', 'upstream_unavailable', 'error'
+SCRAPED = (OK, UPSTREAM_UNAVAILABLE, ERROR)  # outcomes of runs that held the lease
+
+
+def status_path(state_dir, feed, holder=LEASE_HOLDER):
+    return pathlib.Path(state_dir) / f"{feed}.{holder}.status.json"
+
+
+class RunStatus:
+    """Records the start and outcome of one scraper run"""
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self.started = None
+
+    def start(self):
+        self.started = self.clock()
+        with locked_json(self.path, {}) as (status, write):
+            status.update(last_attempt=self.started, running=True)
+            write(status)
+
+    def finish(self, outcome, error=None, new_episodes=0, newest_episode=None):
+        now = self.clock()
+        with locked_json(self.path, {}) as (status, write):
+            status.update(outcome=outcome, error=error, running=False,
+                          duration=round(now - (self.started or now), 3))
+            if outcome == OK:
+                status['last_success'] = now
+            elif outcome == STANDBY:
+                status['last_standby'] = now
+            if new_episodes:
+                status['last_new_episode'] = now
+            if newest_episode is not None:
+                status['newest_episode'] = newest_episode.timestamp()
+            write(status)
+
+
+def mark_started(path, clock=time.time):
+    """Remember when the container came up, so a feed that has not been
+    scheduled yet is not reported as stale"""
+    with locked_json(path, {}) as (status, write):
+        status['container_started'] = clock()
+        write(status)
+
+
+def _cron_field(field, low, high):
+    """Expand one crontab field (*, */n, a-b, a-b/n, a,b) into a set"""
+    values = set()
+    for part in field.split(','):
+        spec, _, step = part.partition('/')
+        if spec == '*':
+            start, end = low, high
+        elif '-' in spec:
+            start, end = (int(v) for v in spec.split('-'))
+        else:
+            start = end = int(spec)
+        values.update(range(start, end + 1, int(step or 1)))
+    return values
+
+
+def read_schedule(crontab):
+    """(minutes, hours) of the first job in a crontab; day fields are assumed to be *"""
+    for line in pathlib.Path(crontab).read_text(encoding='utf-8').splitlines():
+        fields = line.split()
+        if not fields or line.lstrip().startswith('#') or '=' in fields[0]:
+            continue
+        return _cron_field(fields[0], 0, 59), _cron_field(fields[1], 0, 23)
+    raise ValueError(f"No job found in {crontab}")
+
+
+def previous_runs(schedule, now, count):
+    """The `count` most recent scheduled run times up to now, newest first"""
+    minutes, hours = schedule
+    tick = now.replace(second=0, microsecond=0)
+    runs = []
+    for _ in range(8 * 24 * 60):
+        if tick.minute in minutes and tick.hour in hours:
+            runs.append(tick)
+            if len(runs) == count:
+                break
+        tick -= timedelta(minutes=1)
+    return runs
+
+
+def episode_cadence(store_path):
+    """Largest gap in seconds between stored episodes, or None if unknown"""
+    episodes = EpisodeStore(store_path).episodes
+    dates = sorted(datetime.fromisoformat(ep['dt']).timestamp() for ep in episodes.values())
+    if len(dates) < 2:
+        return None
+    return max(later - earlier for earlier, later in zip(dates, dates[1:]))
+
+
+def check(feed, state_dir=STATE_DIR, crontab=CRONTAB, missed_runs=HEALTH_MISSED_RUNS,
+          episode_slack=HEALTH_EPISODE_SLACK, now=None, holder=LEASE_HOLDER, lease_holder=None):
+    """Return a list of problems for this host; empty means healthy.
+
+    lease_holder is the host currently holding the feed lease (None when
+    leases are disabled or the lease has expired). Without a holder, a host
+    counts as the leader if its latest run scraped rather than stood by: a
+    lease lapses between a show's scheduled hours too, and a standby host is
+    not to blame for that.
+    """
+    now = now if now is not None else time.time()
+    status = read_json(status_path(state_dir, feed, holder), {})
+    if lease_holder is None:
+        leader = status.get('outcome') in SCRAPED
+    else:
+        leader = lease_holder == holder
+    problems = []
+
+    # Every run since the Nth-last scheduled one should have attempted (and
+    # one of them succeeded); the current minute's run may not have started yet
+    runs = previous_runs(read_schedule(crontab), datetime.fromtimestamp(now - 60), missed_runs)
+    deadline = runs[-1].timestamp() if len(runs) == missed_runs else None
+    if deadline is not None and status.get('container_started', 0) < deadline:
+        last_attempt = status.get('last_attempt', 0)
+        last_success = status.get('last_success', 0)
+        if not leader:
+            last_success = max(last_success, status.get('last_standby', 0))
+        if last_attempt < deadline:
+            problems.append(f"no run attempted {_since(now, last_attempt)} ({missed_runs} scheduled runs missed)")
+        elif last_success < deadline:
+            outcome = status.get('outcome')
+            if status.get('error'):
+                outcome = f"{outcome}: {status['error']}"
+            problems.append(f"no successful run {_since(now, last_success)} (last outcome {outcome})")
+
+    if status.get('running') and now - status.get('last_attempt', now) > RUN_TIMEOUT:
+        problems.append(f"run started {_duration(now - status['last_attempt'])} ago is still marked running")
+
+    # Only the host that scrapes is expected to see new episodes
+    cadence = episode_cadence(pathlib.Path(state_dir) / f"{feed}.episodes.json") if leader else None
+    newest = status.get('newest_episode')
+    if cadence and newest and now - newest > cadence * episode_slack:
+        problems.append(f"newest episode is {_duration(now - newest)} old, "
+                        f"expected one every {_duration(cadence)} at most")
+    return problems
+
+
+def _duration(seconds):
+    if seconds >= 2 * 3600:
+        return f"{seconds / 3600:.1f}h"
+    return f"{int(seconds) // 60}m"
+
+
+def _since(now, then):
+    return f"for {_duration(now - then)}" if then else 'ever'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Feed healthcheck based on the run heartbeat')
+    parser.add_argument('--feed', default=os.environ.get('FEED_NAME', 'v'))
+    parser.add_argument('--crontab', default=CRONTAB, type=pathlib.Path)
+    parser.add_argument('--mark-started', action='store_true',
+                        help='Record the container start time (called by start-cron.sh)')
+    args = parser.parse_args(argv)
+
+    if args.mark_started:
+        mark_started(status_path(STATE_DIR, args.feed))
+        return 0
+
+    record = open_lease(f"feed-{args.feed}", STATE_DIR).current()
+    lease_holder = record['holder'] if record and record['expires'] > time.time() else None
+    problems = check(args.feed, crontab=args.crontab, lease_holder=lease_holder)
+    for problem in problems:
+        print(f"❌ {args.feed}: {problem}")
+    if not problems:
+        print(f"✅ {args.feed}: healthy")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
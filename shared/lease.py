@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""Per-feed leases so only one scraper host polls HRT at a time.
+
+Every host that shares the ./feeds volume tries to acquire the lease for its
+feed on each cron tick. The holder keeps it alive with a heartbeat; once the
+heartbeat stops the lease expires after LEASE_TTL seconds and the next tick on
+a standby host takes over. The heartbeat daemon next to crond only renews
+while this host's cron runs keep succeeding (within LEASE_RUN_INTERVAL plus
+LEASE_TTL), so a leader whose crond died or whose runs keep failing lets the
+lease lapse. Each takeover bumps a fencing token, and the
+generator re-checks its token right before replacing the feed file so a
+leader that lost the lease mid-run cannot overwrite its successor's output.
+
+Backends:
+  file    JSON lease files guarded by flock on the shared volume; use this
+          for multi-host setups
+  sqlite  a local SQLite database, a stand-in for a real coordination
+          service and handy for single-machine testing
+  none    no coordination, every run is the leader (default)
+"""
+import os, sys, time, socket, sqlite3, pathlib, threading
+from contextlib import contextmanager
+
+from statefile import locked_json, read_json
+
+LEASE_BACKEND = os.environ.get('LEASE_BACKEND', 'none').lower()
+LEASE_TTL = int(os.environ.get('LEASE_TTL', '60'))
+LEASE_HOLDER = os.environ.get('LEASE_HOLDER') or socket.gethostname()
+LEASE_RUN_INTERVAL = int(os.environ.get('LEASE_RUN_INTERVAL', '300'))  # one cron tick
+
+
+class LeaseLost(Exception):
+    """Raised when this host no longer holds the lease it is writing under"""
+
+
+class FileLeaseBackend:
+    """Lease records stored as JSON files, one per lease name"""
+
+    def __init__(self, directory):
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def transaction(self, name):
+        """Yield (record, write) while holding an exclusive lock on the lease"""
+        return locked_json(self.directory / f"{name}.lease")
+
+
+class SQLiteLeaseBackend:
+    """Lease records stored in a SQLite table, serialised with BEGIN IMMEDIATE"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        pathlib.Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS leases ('
+                       'name TEXT PRIMARY KEY, holder TEXT, token INTEGER, expires REAL)')
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    @contextmanager
+    def transaction(self, name):
+        db = self._connect()
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            row = db.execute('SELECT holder, token, expires FROM leases WHERE name = ?',
+                             (name,)).fetchone()
+            record = dict(zip(('holder', 'token', 'expires'), row)) if row else None
+
+            def write(new_record):
+                db.execute('INSERT OR REPLACE INTO leases (name, holder, token, expires) '
+                           'VALUES (?, ?, ?, ?)',
+                           (name, new_record['holder'], new_record['token'], new_record['expires']))
+
+            yield record, write
+            db.execute('COMMIT')
+        except BaseException:
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            raise
+        finally:
+            db.close()
+
+
+class Lease:
+    """A named lease held by one holder at a time, with a fencing token"""
+
+    def __init__(self, backend, name, holder=LEASE_HOLDER, ttl=LEASE_TTL, clock=time.time):
+        self.backend = backend
+        self.name = name
+        self.holder = holder
+        self.ttl = ttl
+        self.clock = clock
+        self.token = None
+        self._heartbeat = None
+        self._stop = threading.Event()
+
+    def acquire(self):
+        """Take the lease if it is free, expired or already ours"""
+        now = self.clock()
+        with self.backend.transaction(self.name) as (record, write):
+            if record and record['holder'] != self.holder and record['expires'] > now:
+                self.token = None
+                return False
+            if record and record['holder'] == self.holder and record['expires'] > now:
+                token = record['token']
+            else:
+                # New term: bump the fencing token so stale writers can be detected
+                token = (record['token'] if record else 0) + 1
+            write({'holder': self.holder, 'token': token, 'expires': now + self.ttl})
+        self.token = token
+        return True
+
+    def renew(self):
+        """Extend the lease; False if another holder has taken it over"""
+        if self.token is None:
+            return False
+        now = self.clock()
+        with self.backend.transaction(self.name) as (record, write):
+            if not record or record['holder'] != self.holder or record['token'] != self.token:
+                self.token = None
+                return False
+            write({'holder': self.holder, 'token': self.token, 'expires': now + self.ttl})
+        return True
+
+    def verify(self):
+        """Fencing check before a write; raises LeaseLost if we are no longer leader"""
+        token = self.token
+        if not self.renew():
+            raise LeaseLost(f"Lease {self.name} (token {token}) is no longer held by {self.holder}")
+
+    def release(self):
+        """Give the lease up immediately so a standby can take over on its next tick"""
+        if self.token is None:
+            return
+        with self.backend.transaction(self.name) as (record, write):
+            if record and record['holder'] == self.holder and record['token'] == self.token:
+                write({'holder': self.holder, 'token': self.token, 'expires': 0})
+        self.token = None
+
+    def current(self):
+        """Return the stored lease record (holder, token, expires) or None"""
+        with self.backend.transaction(self.name) as (record, write):
+            return record
+
+    def start_heartbeat(self, interval=None):
+        """Renew the lease from a daemon thread for the duration of a run"""
+        if self._heartbeat or self.token is None:
+            return
+        interval = interval or max(1, self.ttl / 3)
+        self._stop.clear()
+
+        def beat():
+            while not self._stop.wait(interval):
+                if not self.renew():
+                    return
+
+        self._heartbeat = threading.Thread(target=beat, name=f"lease-{self.name}", daemon=True)
+        self._heartbeat.start()
+
+    def stop_heartbeat(self):
+        if self._heartbeat:
+            self._stop.set()
+            self._heartbeat.join()
+            self._heartbeat = None
+
+
+class NullLease:
+    """Lease stand-in used when coordination is disabled; always the leader"""
+
+    name = holder = None
+    token = 0
+
+    def acquire(self):
+        return True
+
+    def renew(self):
+        return True
+
+    def verify(self):
+        pass
+
+    def release(self):
+        pass
+
+    def current(self):
+        return None
+
+    def start_heartbeat(self, interval=None):
+        pass
+
+    def stop_heartbeat(self):
+        pass
+
+
+def open_lease(name, state_dir, backend=LEASE_BACKEND):
+    """Build the lease for a feed from the LEASE_BACKEND setting"""
+    state_dir = pathlib.Path(state_dir)
+    if backend == 'file':
+        return Lease(FileLeaseBackend(state_dir / 'leases'), name)
+    if backend == 'sqlite':
+        return Lease(SQLiteLeaseBackend(os.environ.get('LEASE_DB', state_dir / 'leases.sqlite')), name)
+    if backend == 'none':
+        return NullLease()
+    raise ValueError(f"Unknown LEASE_BACKEND: {backend}")
+
+
+def renew_if_scraping(lease, status_file, interval=LEASE_RUN_INTERVAL):
+    """Renew a lease this host holds, but only while its cron runs succeed.
+
+    Never acquires: only a lease a cron run has already won is kept alive.
+    Returns True if the lease was renewed.
+    """
+    record = lease.current()
+    if not record or record['holder'] != lease.holder:
+        return False
+    last_success = read_json(status_file, {}).get('last_success', 0)
+    if lease.clock() - last_success > interval + lease.ttl:
+        return False
+    lease.token = record['token']
+    return lease.renew()
+
+
+def main():
+    """Heartbeat daemon started next to crond: keeps a held lease alive between cron runs"""
+    import argparse
+    from health import status_path  # health imports this module
+
+    parser = argparse.ArgumentParser(description='Feed lease heartbeat')
+    parser.add_argument('name', help='Lease name, e.g. feed-v')
+    parser.add_argument('--state-dir', default=os.environ.get('STATE_DIR', '/app/feeds/.state'))
+    args = parser.parse_args()
+
+    lease = open_lease(args.name, args.state_dir)
+    if isinstance(lease, NullLease):
+        return 0
+
+    feed = args.name.removeprefix('feed-')
+    status_file = status_path(args.state_dir, feed, lease.holder)
+    lapsing = False
+    while True:
+        record = lease.current()
+        held = record and record['holder'] == lease.holder and record['expires'] > lease.clock()
+        if held and not renew_if_scraping(lease, status_file):
+            if not lapsing:
+                print(f"No successful {feed} run for over {LEASE_RUN_INTERVAL + lease.ttl}s, "
+                      f"letting lease {args.name} lapse", flush=True)
+            lapsing = True
+        else:
+            lapsing = False
+        time.sleep(max(1, lease.ttl / 3))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
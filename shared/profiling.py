@@ -0,0 +1,107 @@
+"""Per-stage profiling for a single scraper run (feed.py --profile).
+
+Every stage (fetch, extract, parse, render, write) gets its own cProfile
+profile plus tracemalloc peak and top allocations. The time spent taking and
+comparing tracemalloc snapshots is kept out of the stage and run totals and
+reported on its own line. Results are written under
+logs/profile/<feed>-<timestamp>/:
+
+  <stage>.prof   raw cProfile data (pstats, snakeviz, ...)
+  <stage>.txt    top functions by cumulative time and top allocation sites
+  summary.txt    the table printed at the end of the run
+  summary.json   the same numbers for comparing branches
+"""
+import io, json, time, pstats, cProfile, pathlib, tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+TOP_FUNCTIONS = 15
+TOP_ALLOCATIONS = 10
+
+
+class NullProfiler:
+    """Profiler stand-in used when --profile is not given"""
+
+    def stage(self, name):
+        return nullcontext()
+
+
+class RunProfiler:
+    """Collects cProfile and tracemalloc data per stage of one run"""
+
+    def __init__(self, out_dir, label):
+        self.out_dir = pathlib.Path(out_dir) / f"{label}-{datetime.now():%Y%m%d-%H%M%S}"
+        self.label = label
+        self.stages = {}
+        self.started = time.perf_counter()
+        self.snapshot_time = 0.0
+        tracemalloc.start(25)
+
+    @contextmanager
+    def stage(self, name):
+        data = self.stages.setdefault(name, {
+            'profile': cProfile.Profile(), 'wall': 0.0, 'peak': 0, 'allocated': 0, 'allocations': []})
+        snapshot_start = time.perf_counter()
+        before = tracemalloc.take_snapshot()
+        self.snapshot_time += time.perf_counter() - snapshot_start
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        data['profile'].enable()
+        try:
+            yield
+        finally:
+            data['profile'].disable()
+            data['wall'] += time.perf_counter() - start
+            current, peak = tracemalloc.get_traced_memory()
+            data['peak'] = max(data['peak'], peak - base)
+            data['allocated'] += current - base
+            snapshot_start = time.perf_counter()
+            diff = tracemalloc.take_snapshot().compare_to(before, 'lineno')
+            data['allocations'] = [stat for stat in diff if stat.size_diff > 0][:TOP_ALLOCATIONS]
+            self.snapshot_time += time.perf_counter() - snapshot_start
+
+    def summary(self):
+        """Return per-stage numbers as plain dicts"""
+        rows = []
+        for name, data in self.stages.items():
+            stats = pstats.Stats(data['profile'])
+            rows.append({
+                'stage': name,
+                'wall_ms': round(data['wall'] * 1000, 1),
+                'calls': stats.total_calls,
+                'peak_kib': round(data['peak'] / 1024, 1),
+                'retained_kib': round(data['allocated'] / 1024, 1),
+            })
+        return rows
+
+    def format_summary(self, rows):
+        total = time.perf_counter() - self.started - self.snapshot_time
+        lines = [f"Profile {self.label} ({total * 1000:.0f} ms total, output in {self.out_dir})",
+                 f"{'stage':<10}{'wall ms':>10}{'calls':>10}{'peak KiB':>11}{'kept KiB':>11}"]
+        for row in rows:
+            lines.append(f"{row['stage']:<10}{row['wall_ms']:>10.1f}{row['calls']:>10}"
+                         f"{row['peak_kib']:>11.1f}{row['retained_kib']:>11.1f}")
+        lines.append(f"tracemalloc snapshots took {self.snapshot_time * 1000:.0f} ms (not in the total)")
+        return '\n'.join(lines)
+
+    def write(self):
+        """Write all profile files and return the compact summary text"""
+        tracemalloc.stop()
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+
+        for name, data in self.stages.items():
+            data['profile'].dump_stats(str(self.out_dir / f"{name}.prof"))
+            report = io.StringIO()
+            stats = pstats.Stats(data['profile'], stream=report)
+            stats.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+            report.write(f"Top allocations (peak {data['peak'] / 1024:.1f} KiB):\n")
+            for stat in data['allocations']:
+                report.write(f"  {stat}\n")
+            (self.out_dir / f"{name}.txt").write_text(report.getvalue(), encoding='utf-8')
+
+        rows = self.summary()
+        text = self.format_summary(rows)
+        (self.out_dir / 'summary.txt').write_text(text + '\n', encoding='utf-8')
+        (self.out_dir / 'summary.json').write_text(json.dumps(rows, indent=2), encoding='utf-8')
+        return text
@@ -21,6 +21,18 @@ server {
         try_files /index.html =404;
         add_header X-Served-By $hostname;
     }
+
+    # Content-hashed artwork variants never change once written
+    location ~ "^/[^/]+/artwork/[^/]+\.[0-9a-f]{10}\.(jpg|webp)$" {
+        add_header Cache-Control "public, max-age=31536000, immutable" always;
+        add_header X-Cache-Status "NGINX-IMG-VARIANT";
+    }
+
+    # Scraper coordination state (leases etc.) lives in dot-directories
+    location ~ /\. {
+        deny all;
+        access_log off;
+    }
 MAIN_CONFIG
 
 # Replace placeholders
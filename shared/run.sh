@@ -20,19 +20,21 @@ LOCK_FILE="/tmp/run_${PODCAST_NAME}.lock"
 # Ensure log directory exists
 mkdir -p "$(dirname "$LOG_FILE")"
 
-# Function to cleanup lock file on exit
+# Function to release the run lock on exit
 cleanup() {
-    rm -f "$LOCK_FILE"
+    flock -u 9 2>/dev/null || true
 }
 trap cleanup EXIT
 
-# Check for existing lock to prevent duplicate runs
-if [[ -f "$LOCK_FILE" ]]; then
-    echo "⚠️ Another instance is already running (lock file exists: $LOCK_FILE)"
+# Prevent duplicate runs with an flock held for the lifetime of this process.
+# The kernel drops it when the run dies (timeout, OOM kill, container restart),
+# so a crashed run can no longer leave a lock file behind that blocks every
+# later cron tick.
+exec 9>>"$LOCK_FILE"
+if ! flock -n 9; then
+    echo "⚠️ Another instance is already running (pid $(cat "$LOCK_FILE" 2>/dev/null), lock: $LOCK_FILE)"
     exit 1
 fi
-
-# Create lock file
 echo $$ > "$LOCK_FILE"
 
 # Function to log with timestamp and colors
@@ -222,6 +224,7 @@ show_usage() {
     echo -e "\n\033[1mOptions:\033[0m"
     echo -e "  🔄 --fetch-all    Fetch all available episodes instead of just new ones"
     echo -e "  🔇 --quiet        Suppress Telegram notifications (useful for manual runs)"
+    echo -e "  ⏱️  --profile      Profile each stage and write results to /app/logs/profile/"
     echo -e "  🧪 --test         Test Telegram notification configuration"
     echo -e "  🐛 --debug        Run environment diagnostics"
     echo -e "  ❓ --help         Show this help message"
@@ -252,6 +255,10 @@ while [[ $# -gt 0 ]]; do
             QUIET_MODE=true
             shift
             ;;
+        --profile)
+            PYTHON_ARGS+=("--profile")
+            shift
+            ;;
         --test)
             check_notification_config
             test_notifications
@@ -365,6 +372,11 @@ main() {
         fi
     else
         local exit_code=$?
+        if [[ $exit_code -eq 75 ]]; then
+            # EX_TEMPFAIL from feed.py: HRT circuit is open, the breaker already alerted on the state change
+            log_both "HRT nedostupan (circuit open) - preskačem ovaj krug bez alarma" "WARNING"
+            exit 0
+        fi
         local error_msg="Script failed with exit code $exit_code"
         log_both "$error_msg" "ERROR"
         # Only send alert if not in quiet mode AND notifications enabled
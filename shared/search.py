@@ -0,0 +1,163 @@
+"""Static, incrementally maintained search index over episode titles and intros.
+
+The landing page searches past episodes without a server: everything it
+needs is plain JSON under feeds/search/, fetched only for the words typed.
+
+  search/meta.json          layout, stopwords and document count
+  search/terms/<xx>.json    {term: [[doc id, broadcast time], ...]} for terms
+                            starting with xx, newest first
+  search/docs/<n>.json      {doc id: {feed, title, desc, dt, mp3}} for ids
+                            n * DOC_SHARD_SIZE ... (n + 1) * DOC_SHARD_SIZE - 1
+
+Text is lowercased and diacritics are folded (č, ć -> c, š -> s, ž -> z,
+đ -> d), so "Sibenik" finds "Šibenik". Terms are sharded by their first two
+characters; the page matches query words as prefixes within one shard, which
+also covers Croatian case endings (zagreb -> zagreba, zagrebu). Postings
+carry each episode's broadcast time (Unix seconds), so matches can be ranked
+newest first before any document shard is fetched; doc ids only reflect the
+order episodes were indexed in.
+
+Indexing is incremental: scrapers pass only the episodes their run rendered
+(new or edited ones), and a run only loads and rewrites the shards those
+touch. STATE_DIR/search.json holds just the next doc id; the doc id of every
+indexed mp3 is kept in STATE_DIR/search-ids/<xx>.json, sharded by a hash of
+the URL, so an edited episode keeps its doc. The archive keeps growing after
+episodes drop out of the feeds.
+"""
+import os, re, hashlib, pathlib, unicodedata
+from collections import defaultdict
+
+from statefile import locked_json, read_json, write_json
+
+FEEDS_DIR = pathlib.Path(os.environ.get('FEEDS_DIR', pathlib.Path(__file__).resolve().parent.parent / 'feeds'))
+STATE_DIR = pathlib.Path(os.environ.get('STATE_DIR', FEEDS_DIR / '.state'))
+SEARCH_DIR = FEEDS_DIR / 'search'
+INDEX_VERSION = 2
+PREFIX_LENGTH = 2
+DOC_SHARD_SIZE = 200
+
+# Words too common to be worth a posting list
+STOPWORDS = frozenset('''
+    a ako ali bi bila bilo bio bit biti cak da do dok ga gdje i ih ili iz
+    ja je jer jos ju kad kada kako kao koja koje koji kojih kojim kojima koju
+    li ma me mu na nad nakon ne nego nije niti no o od oko ona one oni ono
+    pa po pod pored pred prema pri prije s sa sam se si sta su sve svi ta te
+    ti to tu uz vec za zbog
+'''.split())
+
+_FOLD = str.maketrans({'đ': 'd', 'Đ': 'd'})  # đ has no Unicode decomposition
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def fold(text):
+    """Lowercase and strip diacritics (Croatian letters included)"""
+    decomposed = unicodedata.normalize('NFKD', text.translate(_FOLD).lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    """Folded, de-duplicated index terms of a text"""
+    return {word for word in _WORD.findall(fold(text))
+            if len(word) >= PREFIX_LENGTH and word not in STOPWORDS}
+
+
+class SearchIndex:
+    """Sharded inverted index under out_dir, bookkept in state_path"""
+
+    def __init__(self, out_dir=SEARCH_DIR, state_path=STATE_DIR / 'search.json'):
+        self.out_dir = pathlib.Path(out_dir)
+        self.state_path = pathlib.Path(state_path)
+        self.ids_dir = self.state_path.with_name(f"{self.state_path.stem}-ids")
+
+    def _term_shard(self, term):
+        return self.out_dir / 'terms' / f"{term[:PREFIX_LENGTH]}.json"
+
+    def _doc_shard(self, doc_id):
+        return self.out_dir / 'docs' / f"{doc_id // DOC_SHARD_SIZE}.json"
+
+    def _id_shard(self, mp3):
+        return self.ids_dir / f"{hashlib.sha256(mp3.encode('utf-8')).hexdigest()[:2]}.json"
+
+    def add(self, slug, episodes):
+        """Index new or edited (mp3, title, desc, dt) episodes of a show; returns
+        how many docs changed"""
+        with locked_json(self.state_path, {'next_id': 0}) as (state, write):
+            next_id = state['next_id']
+            ids = self._load(self._id_shard, (mp3 for mp3, title, desc, dt in episodes))
+            pending = []
+            for mp3, title, desc, dt in episodes:
+                known = ids[self._id_shard(mp3)]
+                if mp3 not in known:
+                    known[mp3] = next_id
+                    next_id += 1
+                pending.append((known[mp3], {'feed': slug, 'title': title, 'desc': desc,
+                                             'dt': dt.isoformat(), 'mp3': mp3}, int(dt.timestamp())))
+
+            docs = self._load(self._doc_shard, (doc_id for doc_id, doc, ts in pending))
+            postings = defaultdict(lambda: (set(), {}))  # term -> (remove ids, {add id: time})
+            touched, changed = set(), 0
+            for doc_id, doc, ts in pending:
+                shard = docs[self._doc_shard(doc_id)]
+                previous = shard.get(str(doc_id))
+                if previous == doc:
+                    continue
+                touched.add(self._doc_shard(doc_id))
+                changed += 1
+                old_terms = tokenize(f"{previous['title']} {previous['desc']}") if previous else set()
+                new_terms = tokenize(f"{doc['title']} {doc['desc']}")
+                # A new broadcast time has to reach every posting of the doc
+                moved = previous is not None and previous['dt'] != doc['dt']
+                unchanged = set() if moved else old_terms & new_terms
+                for term in old_terms - unchanged:
+                    postings[term][0].add(doc_id)
+                for term in new_terms - unchanged:
+                    postings[term][1][doc_id] = ts
+                shard[str(doc_id)] = doc
+
+            terms = self._load(self._term_shard, postings)
+            for term, (removed, added) in postings.items():
+                shard = terms[self._term_shard(term)]
+                entries = [entry for entry in shard.get(term, []) if entry[0] not in removed and entry[0] not in added]
+                entries += [[doc_id, ts] for doc_id, ts in added.items()]
+                if entries:
+                    shard[term] = sorted(entries, key=lambda entry: (entry[1], entry[0]), reverse=True)
+                else:
+                    shard.pop(term, None)
+
+            if not touched:
+                return 0
+            if next_id != state['next_id']:
+                for path, data in ids.items():
+                    write_json(path, data)
+            for path in touched:
+                write_json(path, docs[path])
+            for path, data in terms.items():
+                write_json(path, data)
+            write_json(self.out_dir / 'meta.json', {
+                'version': INDEX_VERSION, 'prefix_length': PREFIX_LENGTH,
+                'doc_shard_size': DOC_SHARD_SIZE, 'docs': next_id,
+                'stopwords': sorted(STOPWORDS)})
+            write({'next_id': next_id})
+            return changed
+
+    def _load(self, shard_for, keys):
+        shards = {}
+        for key in keys:
+            path = shard_for(key)
+            if path not in shards:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                shards[path] = read_json(path, {})
+        return shards
+
+    def search(self, query, limit=None):
+        """Ids of the newest `limit` docs matching every query word as a prefix
+        (what the page does)"""
+        result = None
+        for word in tokenize(query):
+            shard = read_json(self._term_shard(word), {})
+            matches = {doc_id: ts for term, postings in shard.items() if term.startswith(word)
+                       for doc_id, ts in postings}
+            result = matches if result is None else {i: ts for i, ts in result.items() if i in matches}
+        ranked = sorted((result or {}).items(), key=lambda match: (match[1], match[0]), reverse=True)
+        return [doc_id for doc_id, ts in ranked[:limit]]
+
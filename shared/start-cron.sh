@@ -50,6 +50,15 @@ echo "   Python path: $(which python3)"
 echo "🧪 Testing Python modules..."
 python3 -c "import requests, feedparser; print('✅ All Python modules available')" || echo "❌ Python modules missing"
 
+# Runs scheduled before this start are not expected by the healthcheck
+python3 /app/shared/health.py --mark-started || echo "⚠️ Could not record start time for the healthcheck"
+
+# Keep this host's feed lease alive between cron runs (no-op unless LEASE_BACKEND is set)
+if [[ "${LEASE_BACKEND:-none}" != "none" ]]; then
+    echo "🔐 Starting lease heartbeat for feed-${FEED_NAME} (${LEASE_BACKEND}, holder ${LEASE_HOLDER:-$(hostname)})..."
+    python3 /app/shared/lease.py "feed-${FEED_NAME}" >> /app/logs/lease_${PODCAST_NAME}.log 2>&1 &
+fi
+
 # Start cron in foreground
 echo "🔄 Starting cron daemon for ${PODCAST_NAME}..."
 exec crond -f -l 2
@@ -0,0 +1,37 @@
+"""Small JSON state files shared between scraper runs, containers and hosts.
+
+Readers never see a half-written file (writes go through a temp file and
+os.replace), and read-modify-write cycles are serialised with flock on a
+sidecar lock file so concurrent feeds cannot lose each other's updates.
+"""
+import os, json, pathlib, fcntl
+from contextlib import contextmanager
+
+
+def read_json(path, default=None):
+    """Load a JSON state file, returning default if it is missing or corrupt"""
+    try:
+        return json.loads(pathlib.Path(path).read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        return default
+
+
+def write_json(path, data):
+    """Atomically replace a JSON state file"""
+    path = pathlib.Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    os.replace(tmp, path)
+
+
+@contextmanager
+def locked_json(path, default=None):
+    """Yield (data, write) while holding an exclusive lock on a JSON state file"""
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(f"{path.name}.lock"), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield read_json(path, default), lambda data: write_json(path, data)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
@@ -0,0 +1,150 @@
+"""Upstream protection for HRT requests: circuit breaker and shared rate limit.
+
+Both keep their state in JSON files under STATE_DIR/upstream, so every feed
+container (and every host on the shared volume) sees the same view of an
+upstream host.
+
+Circuit breaker states:
+  closed     normal operation, requests go through with retries
+  open       upstream is considered down; runs skip the fetch entirely until
+             the cooldown expires
+  half-open  one run sends a single probe request; success closes the
+             circuit, failure re-opens it with a doubled cooldown
+"""
+import os, time
+from statefile import locked_json
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+BREAKER_FAILURES = int(os.environ.get('BREAKER_FAILURES', '3'))
+BREAKER_COOLDOWN = int(os.environ.get('BREAKER_COOLDOWN', '240'))  # just under one cron tick
+BREAKER_MAX_COOLDOWN = int(os.environ.get('BREAKER_MAX_COOLDOWN', '3600'))
+RATE_LIMIT_PER_MINUTE = float(os.environ.get('HRT_RATE_PER_MINUTE', '6'))
+RATE_LIMIT_BURST = int(os.environ.get('HRT_RATE_BURST', '3'))
+
+
+class CircuitOpen(Exception):
+    """The upstream host is marked as down; the fetch was not attempted"""
+
+    def __init__(self, host, retry_at):
+        self.host = host
+        self.retry_at = retry_at
+        wait = max(0, int(retry_at - time.time()))
+        super().__init__(f"Circuit for {host} is open, next probe in {wait}s")
+
+
+class RateLimited(Exception):
+    """No request token became available within the allowed wait"""
+
+
+class CircuitBreaker:
+    """Persisted closed/open/half-open breaker for one upstream host"""
+
+    def __init__(self, host, state_dir, failure_threshold=BREAKER_FAILURES,
+                 cooldown=BREAKER_COOLDOWN, max_cooldown=BREAKER_MAX_COOLDOWN,
+                 probe_timeout=120, on_transition=None, clock=time.time):
+        self.host = host
+        self.path = os.path.join(state_dir, 'upstream', f"{host}.breaker.json")
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.probe_timeout = probe_timeout
+        self.on_transition = on_transition
+        self.clock = clock
+
+    def _initial(self):
+        return {'state': CLOSED, 'failures': 0, 'cooldown': self.cooldown,
+                'open_until': 0, 'probe_started': 0, 'last_error': None, 'changed': 0}
+
+    def _transition(self, state, new_state, now):
+        old_state = state['state']
+        state['state'] = new_state
+        state['changed'] = now
+        return (old_state, new_state) if old_state != new_state else None
+
+    def _notify(self, transition, state):
+        if transition and self.on_transition:
+            self.on_transition(transition[0], transition[1], state)
+
+    def state(self):
+        with locked_json(self.path, self._initial()) as (state, write):
+            return state
+
+    def allow(self):
+        """Return how many attempts this run may make, or raise CircuitOpen"""
+        now = self.clock()
+        transition = None
+        with locked_json(self.path, self._initial()) as (state, write):
+            if state['state'] == CLOSED:
+                return self.failure_threshold
+            if state['state'] == OPEN and now < state['open_until']:
+                raise CircuitOpen(self.host, state['open_until'])
+            if state['state'] == HALF_OPEN and now - state['probe_started'] < self.probe_timeout:
+                # Another feed is already probing; do not pile on
+                raise CircuitOpen(self.host, state['probe_started'] + self.probe_timeout)
+            transition = self._transition(state, HALF_OPEN, now)
+            state['probe_started'] = now
+            write(state)
+        self._notify(transition, state)
+        return 1
+
+    def record_success(self):
+        now = self.clock()
+        with locked_json(self.path, self._initial()) as (state, write):
+            if state['state'] == CLOSED and state['failures'] == 0:
+                return
+            transition = self._transition(state, CLOSED, now)
+            state.update(failures=0, cooldown=self.cooldown, open_until=0,
+                         probe_started=0, last_error=None)
+            write(state)
+        self._notify(transition, state)
+
+    def record_failure(self, error=None):
+        """Count a failed request; returns True if the circuit is now open"""
+        now = self.clock()
+        transition = None
+        with locked_json(self.path, self._initial()) as (state, write):
+            state['failures'] += 1
+            state['last_error'] = str(error) if error else None
+            if state['state'] == HALF_OPEN:
+                # Failed probe: back off further before the next one
+                state['cooldown'] = min(state['cooldown'] * 2, self.max_cooldown)
+                transition = self._transition(state, OPEN, now)
+            elif state['state'] == CLOSED and state['failures'] >= self.failure_threshold:
+                state['cooldown'] = self.cooldown
+                transition = self._transition(state, OPEN, now)
+            if state['state'] == OPEN and transition:
+                state['open_until'] = now + state['cooldown']
+            write(state)
+        self._notify(transition, state)
+        return state['state'] == OPEN
+
+
+class TokenBucket:
+    """Token-bucket rate limiter persisted on disk and shared by all feeds"""
+
+    def __init__(self, host, state_dir, rate_per_minute=RATE_LIMIT_PER_MINUTE,
+                 burst=RATE_LIMIT_BURST, clock=time.time, sleep=time.sleep):
+        self.path = os.path.join(state_dir, 'upstream', f"{host}.bucket.json")
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+
+    def take(self, max_wait=60):
+        """Consume one token, sleeping until one is available (up to max_wait seconds)"""
+        waited = 0.0
+        while True:
+            now = self.clock()
+            with locked_json(self.path, {'tokens': self.burst, 'updated': now}) as (bucket, write):
+                elapsed = max(0.0, now - bucket['updated'])
+                tokens = min(self.burst, bucket['tokens'] + elapsed * self.rate)
+                if tokens >= 1:
+                    write({'tokens': tokens - 1, 'updated': now})
+                    return waited
+                write({'tokens': tokens, 'updated': now})
+                wait = (1 - tokens) / self.rate
+            if waited + wait > max_wait:
+                raise RateLimited(f"No request token within {max_wait}s")
+            self.sleep(wait)
+            waited += wait
@@ -0,0 +1,120 @@
+"""WebSub (PubSubHubbub) and Podping announcements for published feeds.
+
+The channel advertises the configured hubs with <atom:link rel="hub">, and
+after every feed write the hubs (and optionally Podping) are told the feed
+changed. Pings run on background threads so a slow hub never delays the
+scraper; results are collected once the run is done.
+
+Settings:
+  WEBSUB_HUBS    comma-separated hub URLs, e.g. https://pubsubhubbub.appspot.com/
+  PODPING_TOKEN  Podping.cloud authorization token (Podping disabled if unset)
+  PODPING_URL    Podping endpoint (default https://podping.cloud/)
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+import requests
+from lxml import etree
+from feedgen.ext.base import BaseExtension, BaseEntryExtension
+
+ATOM_NS = 'http://www.w3.org/2005/Atom'
+USER_AGENT = 'Mozilla/5.0 (compatible; PodcastBot/1.0)'
+
+WEBSUB_HUBS = [hub.strip() for hub in os.environ.get('WEBSUB_HUBS', '').split(',') if hub.strip()]
+PODPING_TOKEN = os.environ.get('PODPING_TOKEN')
+PODPING_URL = os.environ.get('PODPING_URL', 'https://podping.cloud/')
+
+
+class WebSubExtension(BaseExtension):
+    """feedgen extension adding <atom:link rel="hub"> to the RSS channel"""
+
+    def __init__(self):
+        self.__hubs = []
+
+    def extend_ns(self):
+        return {'atom': ATOM_NS}
+
+    def extend_rss(self, rss_feed):
+        channel = rss_feed[0]
+        for hub in self.__hubs:
+            etree.SubElement(channel, f'{{{ATOM_NS}}}link', href=hub, rel='hub')
+        return rss_feed
+
+    def hub(self, href=None):
+        """Add a hub URL, or return the configured hubs"""
+        if href is not None:
+            self.__hubs.append(href)
+        return self.__hubs
+
+
+def add_hubs(fg, hubs=None):
+    """Advertise WebSub hubs in a FeedGenerator's channel"""
+    hubs = WEBSUB_HUBS if hubs is None else hubs
+    if not hubs:
+        return
+    fg.register_extension('websub', WebSubExtension, BaseEntryExtension, atom=False, rss=True)
+    for hub in hubs:
+        fg.websub.hub(hub)
+
+
+def ping_hub(hub, topic, timeout=10):
+    """Tell a WebSub hub that the topic (feed URL) has new content"""
+    response = requests.post(hub, data={'hub.mode': 'publish', 'hub.url': topic},
+                             headers={'User-Agent': USER_AGENT}, timeout=timeout)
+    response.raise_for_status()
+    return response.status_code
+
+
+def ping_podping(topic, token, url=PODPING_URL, timeout=10):
+    """Announce a feed update through Podping.cloud"""
+    response = requests.get(url, params={'url': topic},
+                            headers={'Authorization': token, 'User-Agent': USER_AGENT},
+                            timeout=timeout)
+    response.raise_for_status()
+    return response.status_code
+
+
+class Publisher:
+    """Fires publish pings in the background and collects their outcome"""
+
+    def __init__(self, hubs=None, podping_token=PODPING_TOKEN, podping_url=PODPING_URL, timeout=10):
+        self.hubs = WEBSUB_HUBS if hubs is None else hubs
+        self.podping_token = podping_token
+        self.podping_url = podping_url
+        self.timeout = timeout
+        self._executor = None
+        self._pending = []
+
+    @property
+    def enabled(self):
+        return bool(self.hubs or self.podping_token)
+
+    def publish(self, topic):
+        """Queue pings for the topic and return immediately"""
+        if not self.enabled:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='websub')
+        for hub in self.hubs:
+            self._pending.append((hub, self._executor.submit(ping_hub, hub, topic, self.timeout)))
+        if self.podping_token:
+            self._pending.append((self.podping_url, self._executor.submit(
+                ping_podping, topic, self.podping_token, self.podping_url, self.timeout)))
+
+    def wait(self, timeout=None):
+        """Wait for queued pings; returns [(target, error or None)]"""
+        if not self._pending:
+            return []
+        futures = [future for target, future in self._pending]
+        wait_futures(futures, timeout=timeout if timeout is not None else self.timeout + 5)
+        results = []
+        for target, future in self._pending:
+            if not future.done():
+                results.append((target, 'timed out'))
+            elif future.exception():
+                results.append((target, str(future.exception())))
+            else:
+                results.append((target, None))
+        self._pending = []
+        self._executor.shutdown(wait=False)
+        self._executor = None
+        return results
@@ -0,0 +1,5 @@
+import pathlib
+import sys
+
+# Shared helper modules live next to the shell scripts in shared/
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / 'shared'))
@@ -0,0 +1,104 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from lxml import etree
+
+from aggregate import Aggregate, merge_newest
+from episodes import EpisodeStore
+from lease import FileLeaseBackend, Lease, LeaseLost
+
+START = datetime(2026, 10, 19, 4, 0, tzinfo=timezone.utc)
+
+
+def episodes(show, hours):
+    return [(f'https://example.org/{show}/{h}.mp3', show, f'{show} u {h}', START + timedelta(hours=h))
+            for h in sorted(hours, reverse=True)]
+
+
+def save_store(state_dir, feed, items, item_title=None):
+    store = EpisodeStore(state_dir / f'{feed}.episodes.json')
+    store.update(items, [mp3 for mp3, *_ in items], item_title)
+    store.save()
+
+
+def feed_guids(path):
+    return [guid.text for guid in etree.parse(str(path)).iter('guid')]
+
+
+def test_merge_interleaves_streams_newest_first():
+    vijesti = episodes('Vijesti', range(0, 10))
+    kronika = episodes('Jutarnja kronika', [2.5, 3.5])
+    merged = merge_newest([vijesti, kronika, vijesti[:2]], 5)
+
+    assert [ep[3] for ep in merged] == sorted((ep[3] for ep in merged), reverse=True)
+    assert [ep[1] for ep in merged] == ['Vijesti'] * 5
+    merged = merge_newest([vijesti, kronika], 9)
+    assert [ep[1] for ep in merged].count('Jutarnja kronika') == 2
+    assert len({ep[0] for ep in merged}) == 9
+
+
+def test_store_is_kept_newest_first(tmp_path):
+    items = episodes('Vijesti', [1, 5, 3])
+    store = EpisodeStore(tmp_path / 'v.episodes.json')
+    store.update(list(reversed(items)), [mp3 for mp3, *_ in items])
+    assert store.newest_first() == sorted(items, key=lambda ep: ep[3], reverse=True)
+
+
+def test_refresh_renders_only_when_a_member_changed(tmp_path):
+    save_store(tmp_path, 'v', episodes('Vijesti', range(0, 6)))
+    save_store(tmp_path, 'jk', episodes('Jutarnja kronika', [2.5]))
+    aggregate = Aggregate(['v', 'jk'], feeds_dir=tmp_path, state_dir=tmp_path, max_episodes=4)
+
+    assert aggregate.refresh()
+    guids = feed_guids(aggregate.feed_file)
+    assert guids == [f'https://example.org/Vijesti/{h}.mp3' for h in (5, 4, 3)] + \
+        ['https://example.org/Jutarnja kronika/2.5.mp3']
+
+    mtime = aggregate.feed_file.stat().st_mtime_ns
+    assert not aggregate.refresh()
+    assert aggregate.feed_file.stat().st_mtime_ns == mtime
+
+    save_store(tmp_path, 'jk', episodes('Jutarnja kronika', [2.5, 6.5]))
+    assert aggregate.refresh()
+    assert feed_guids(aggregate.feed_file)[0] == 'https://example.org/Jutarnja kronika/6.5.mp3'
+
+
+def test_items_keep_their_member_feed_titles(tmp_path, caplog):
+    save_store(tmp_path, 'v', episodes('Vijesti', [1]), lambda title, dt: f"{title} - {dt:%H:%M} (HRT)")
+    save_store(tmp_path, 'jk', episodes('Jutarnja kronika', [0.5]), lambda title, dt: f"{title} (HRT)")
+    log = logging.getLogger('test-member-feed')
+    aggregate = Aggregate(['v', 'jk'], feeds_dir=tmp_path, state_dir=tmp_path, log=log)
+
+    with caplog.at_level(logging.INFO, logger=log.name):
+        assert aggregate.refresh()
+    titles = [item.findtext('title') for item in etree.parse(str(aggregate.feed_file)).iter('item')]
+    assert titles == ['Vijesti - 05:00 (HRT)', 'Jutarnja kronika (HRT)']
+    assert {record.name for record in caplog.records} == {log.name}
+    assert any('rendered with 2 episodes' in record.message for record in caplog.records)
+
+
+def test_deposed_leader_cannot_replace_the_combined_feed(tmp_path):
+    now = [1_000_000.0]
+    backend = FileLeaseBackend(tmp_path / 'leases')
+    old, new = (Lease(backend, 'feed-v', holder=host, ttl=60, clock=lambda: now[0]) for host in ('a', 'b'))
+    assert old.acquire()
+    save_store(tmp_path, 'v', episodes('Vijesti', [1]))
+    aggregate = Aggregate(['v'], feeds_dir=tmp_path, state_dir=tmp_path)
+    assert aggregate.refresh(lease=old)
+    published = aggregate.feed_file.read_bytes()
+
+    now[0] += 120  # old leader stalls past its TTL, another host takes over
+    assert new.acquire()
+    save_store(tmp_path, 'v', episodes('Vijesti', [1, 2]))
+    with pytest.raises(LeaseLost):
+        aggregate.refresh(lease=old)
+    assert aggregate.feed_file.read_bytes() == published
+    assert [path.name for path in aggregate.save_dir.iterdir() if path.suffix == '.tmp'] == []
+
+    assert aggregate.refresh(lease=new)
+    assert len(feed_guids(aggregate.feed_file)) == 2
+
+
+def test_disabled_without_members(tmp_path):
+    assert not Aggregate([], feeds_dir=tmp_path, state_dir=tmp_path).refresh()
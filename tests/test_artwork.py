@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+
+from artwork import build_variants, publish_artwork  # noqa: E402
+
+
+def make_source(path, size=(1074, 1080), color=(200, 30, 30)):
+    Image.new('RGB', size, color).save(path, 'JPEG')
+    return path
+
+
+def test_variants_are_square_hashed_and_spec_sized(tmp_path):
+    source = make_source(tmp_path / 'vijesti.jpg')
+    manifest = build_variants(source, tmp_path / 'artwork', 'vijesti')
+
+    # 1080 px source: upscaled once to the 1400 px minimum, never to 3000
+    assert sorted(manifest['variants']['jpeg'], key=int) == ['144', '300', '600', '1400']
+    assert manifest['variants']['webp'].keys() == manifest['variants']['jpeg'].keys()
+    with Image.open(tmp_path / 'artwork' / manifest['variants']['jpeg']['1400']) as image:
+        assert image.size == (1400, 1400)
+        assert image.info.get('progressive')
+
+
+def test_unchanged_source_is_not_regenerated(tmp_path):
+    source = make_source(tmp_path / 'vijesti.jpg')
+    first = build_variants(source, tmp_path / 'artwork', 'vijesti')
+    variant = tmp_path / 'artwork' / first['variants']['jpeg']['300']
+    mtime = variant.stat().st_mtime_ns
+
+    os.utime(source)  # touched, same bytes
+    assert build_variants(source, tmp_path / 'artwork', 'vijesti')['variants'] == first['variants']
+    assert variant.stat().st_mtime_ns == mtime
+
+
+def test_changed_source_gets_new_names_and_keeps_previous_generation(tmp_path):
+    source = make_source(tmp_path / 'vijesti.jpg')
+    first = build_variants(source, tmp_path / 'artwork', 'vijesti')
+    make_source(source, color=(10, 10, 200))
+    os.utime(source, (1, 1))
+    second = build_variants(source, tmp_path / 'artwork', 'vijesti')
+    make_source(source, color=(10, 200, 10))
+    os.utime(source, (2, 2))
+    third = build_variants(source, tmp_path / 'artwork', 'vijesti')
+
+    assert first['variants']['jpeg']['300'] != second['variants']['jpeg']['300']
+    remaining = {p.name for p in (tmp_path / 'artwork').glob('vijesti-*')}
+    assert set(third['variants']['jpeg'].values()) <= remaining
+    assert set(second['variants']['jpeg'].values()) <= remaining
+    assert not set(first['variants']['jpeg'].values()) & remaining
+
+
+def test_feed_urls(tmp_path):
+    make_source(tmp_path / 'vijesti.jpg', size=(3200, 3200))
+    itunes, channel = publish_artwork(tmp_path / 'vijesti.jpg', 'https://example.org/vijesti', 'vijesti')
+    assert itunes.startswith('https://example.org/vijesti/artwork/vijesti-3000.')
+    assert channel.startswith('https://example.org/vijesti/artwork/vijesti-144.')
+
+
+def test_manifest_for_other_sizes_is_rebuilt(tmp_path):
+    source = make_source(tmp_path / 'vijesti.jpg')
+    old = build_variants(source, tmp_path / 'artwork', 'vijesti', sizes=(1400, 300))
+    assert '144' not in old['variants']['jpeg']
+
+    itunes, channel = publish_artwork(source, 'https://example.org/vijesti', 'vijesti')
+    assert itunes.startswith('https://example.org/vijesti/artwork/vijesti-1400.')
+    assert channel.startswith('https://example.org/vijesti/artwork/vijesti-144.')
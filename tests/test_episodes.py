@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta, timezone
+
+from lxml import etree
+
+from episodes import EpisodeStore, feed_item_dates, fingerprint, merge_items
+
+START = datetime(2024, 10, 18, 10, tzinfo=timezone.utc)
+
+
+def episode(n, intro='Pregled vijesti'):
+    return (f'https://example.org/{n}.mp3', f'Vijesti u {10 + n}', f'{intro} {n}',
+            START + timedelta(hours=n))
+
+
+def render(episodes, channel_title='Vijesti'):
+    items = ''.join(
+        f'<item><title>{title}</title><description>{desc}</description>'
+        f'<guid isPermaLink="false">{mp3}</guid>'
+        f'<pubDate>{dt.strftime("%a, %d %b %Y %H:%M:%S +0000")}</pubDate></item>'
+        for mp3, title, desc, dt in sorted(episodes, key=lambda e: e[3], reverse=True))
+    return f'<rss version="2.0"><channel><title>{channel_title}</title>{items}</channel></rss>'.encode()
+
+
+def descriptions(xml):
+    return [item.findtext('description') for item in etree.fromstring(xml).iter('item')]
+
+
+def test_diff_detects_new_changed_and_untracked(tmp_path):
+    store = EpisodeStore(tmp_path / 'v.episodes.json')
+    published = [episode(0), episode(1), episode(2)]
+    store.update(published[1:], [e[0] for e in published])
+    feed_items = feed_item_dates(render(published))
+
+    scraped = [episode(0), episode(1, intro='Ispravak'), episode(2), episode(3)]
+    new, changed, untracked = store.diff(scraped, feed_items, max_items=30)
+
+    assert new == [episode(3)]
+    assert changed == [episode(1, intro='Ispravak')]
+    assert untracked == [episode(0)]
+
+
+def test_diff_ignores_episodes_older_than_a_full_feed(tmp_path):
+    store = EpisodeStore(tmp_path / 'v.episodes.json')
+    published = [episode(1), episode(2)]
+    store.update(published, [e[0] for e in published])
+    new, changed, untracked = store.diff([episode(0)] + published,
+                                         feed_item_dates(render(published)), max_items=2)
+    assert (new, changed, untracked) == ([], [], [])
+
+
+def test_merge_patches_only_rendered_items(tmp_path):
+    existing = render([episode(0), episode(1), episode(2)], channel_title='Old')
+    rendered = render([episode(1, intro='Ispravak'), episode(3)], channel_title='New')
+
+    xml, kept = merge_items(rendered, existing, max_items=3)
+
+    root = etree.fromstring(xml)
+    assert root.findtext('channel/title') == 'New'
+    assert kept == [episode(3)[0], episode(2)[0], episode(1)[0]]
+    assert descriptions(xml) == ['Pregled vijesti 3', 'Pregled vijesti 2', 'Ispravak 1']
+
+
+def test_store_round_trip_and_pruning(tmp_path):
+    path = tmp_path / 'v.episodes.json'
+    store = EpisodeStore(path)
+    store.update([episode(0), episode(1)], keep=[episode(1)[0]])
+    store.save()
+
+    reloaded = EpisodeStore(path)
+    assert list(reloaded.episodes) == [episode(1)[0]]
+    assert reloaded.episodes[episode(1)[0]]['fp'] == fingerprint(*episode(1))
+
+
+def test_undated_episode_keeps_its_first_date(tmp_path):
+    first_seen = datetime(2026, 10, 19, 8, 0, tzinfo=timezone.utc)
+    store = EpisodeStore(tmp_path / 'v.episodes.json')
+    [episode] = store.fill_dates([('https://example.org/a.mp3', 'Vijesti', 'Intro', None)], now=first_seen)
+    assert episode[3] == first_seen
+    store.update([episode], [episode[0]])
+    store.save()
+
+    # Five minutes later HRT still gives no date: the episode must not look edited
+    store = EpisodeStore(tmp_path / 'v.episodes.json')
+    later = first_seen + timedelta(minutes=5)
+    episodes = store.fill_dates([('https://example.org/a.mp3', 'Vijesti', 'Intro', None)], now=later)
+    assert store.diff(episodes, {episode[0]: first_seen}, 30) == ([], [], [])
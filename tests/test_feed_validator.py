@@ -0,0 +1,76 @@
+from feed_validator import validate_feed, validate_feeds
+
+CHANNEL = """<?xml version='1.0' encoding='UTF-8'?>
+<rss xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd" version="2.0">
+  <channel>
+    <title>Vijesti</title>
+    <link>https://example.org/vijesti</link>
+    <description>Test</description>
+    <language>hr</language>
+    <itunes:author>HRT</itunes:author>
+    <itunes:category text="News"/>
+    <itunes:image href="https://example.org/vijesti/vijesti.jpg"/>
+    <itunes:explicit>no</itunes:explicit>
+{items}
+  </channel>
+</rss>
+"""
+
+ITEM = """    <item>
+      <title>Vijesti {n}</title>
+      <guid isPermaLink="false">{guid}</guid>
+      <enclosure url="https://example.org/{n}.mp3" length="{length}" type="audio/mpeg"/>
+      <pubDate>{date}</pubDate>
+    </item>"""
+
+
+def write_feed(tmp_path, items, name='v.xml'):
+    path = tmp_path / name
+    body = '\n'.join(ITEM.format(n=n, guid=guid, date=date, length=length)
+                     for n, (guid, date, length) in enumerate(items))
+    path.write_text(CHANNEL.format(items=body), encoding='utf-8')
+    return path
+
+
+def test_valid_feed(tmp_path):
+    path = write_feed(tmp_path, [
+        ('a', 'Fri, 18 Oct 2024 14:00:00 +0200', '0'),
+        ('b', 'Fri, 18 Oct 2024 13:00:00 +0200', '1234'),
+    ])
+    report = validate_feed(path)
+    assert report.ok, report.errors
+    assert report.items == 2
+
+
+def test_duplicate_guid_and_order(tmp_path):
+    path = write_feed(tmp_path, [
+        ('a', 'Fri, 18 Oct 2024 13:00:00 +0200', '0'),
+        ('a', 'Fri, 18 Oct 2024 14:00:00 +0200', '0'),
+    ])
+    errors = validate_feed(path).errors
+    assert any('duplicate guid' in e for e in errors)
+    assert any('newest-first' in e for e in errors)
+
+
+def test_enclosure_length_and_size_limit(tmp_path):
+    path = write_feed(tmp_path, [('a', 'Fri, 18 Oct 2024 13:00:00 +0200', 'unknown')])
+    errors = validate_feed(path, max_bytes=100).errors
+    assert any('enclosure length' in e for e in errors)
+    assert any('limit is 100' in e for e in errors)
+
+
+def test_missing_itunes_tags_and_items(tmp_path):
+    path = tmp_path / 'bare.xml'
+    path.write_text('<rss version="2.0"><channel><title>x</title></channel></rss>')
+    errors = validate_feed(path).errors
+    assert 'channel is missing <itunes:image>' in errors
+    assert 'no <item> entries found' in errors
+
+
+def test_parse_error_and_pool(tmp_path):
+    good = write_feed(tmp_path, [('a', 'Fri, 18 Oct 2024 13:00:00 +0200', '0')])
+    broken = tmp_path / 'broken.xml'
+    broken.write_text('<rss><channel>')
+    reports = validate_feeds([good, broken], workers=2)
+    assert [r.ok for r in reports] == [True, False]
+    assert 'XML parse error' in reports[1].errors[0]
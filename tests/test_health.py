@@ -0,0 +1,130 @@
+import pathlib
+from datetime import datetime, timedelta, timezone
+
+import health
+from episodes import EpisodeStore
+from health import RunStatus, check, status_path
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+V_CRONTAB = ROOT / 'scripts_v' / 'crontab'    # every 5 minutes
+JK_CRONTAB = ROOT / 'scripts_jk' / 'crontab'  # every 5 minutes, 7-8 h
+
+
+def at(*args):
+    return datetime(2026, 10, *args).timestamp()
+
+
+def record(tmp_path, feed, started, outcome, error=None, holder=health.LEASE_HOLDER, **kwargs):
+    status = RunStatus(status_path(tmp_path, feed, holder), clock=lambda: started)
+    status.start()
+    status.clock = lambda: started + 2
+    status.finish(outcome, error, **kwargs)
+
+
+def test_status_records_attempt_success_and_error(tmp_path):
+    record(tmp_path, 'v', at(19, 10, 0), health.OK, new_episodes=1,
+           newest_episode=datetime(2026, 10, 19, 7, 0, tzinfo=timezone.utc))
+    record(tmp_path, 'v', at(19, 10, 5), health.ERROR, 'boom')
+
+    status = health.read_json(status_path(tmp_path, 'v'))
+    assert status['last_attempt'] == at(19, 10, 5)
+    assert status['last_success'] == status['last_new_episode'] == at(19, 10, 0) + 2
+    assert (status['outcome'], status['error'], status['running'], status['duration']) == ('error', 'boom', False, 2)
+
+
+def test_recent_success_is_healthy(tmp_path):
+    record(tmp_path, 'v', at(19, 10, 0), health.OK)
+    assert check('v', tmp_path, V_CRONTAB, now=at(19, 10, 7)) == []
+
+
+def test_missed_runs_are_unhealthy(tmp_path):
+    record(tmp_path, 'v', at(19, 10, 0), health.OK)
+    [problem] = check('v', tmp_path, V_CRONTAB, now=at(19, 10, 21))
+    assert problem.startswith('no run attempted for 21m')
+
+
+def test_failing_runs_are_unhealthy(tmp_path):
+    record(tmp_path, 'v', at(19, 10, 0), health.OK)
+    for minute in (5, 10, 15, 20):
+        record(tmp_path, 'v', at(19, 10, minute), health.UPSTREAM_UNAVAILABLE, 'circuit open')
+    [problem] = check('v', tmp_path, V_CRONTAB, now=at(19, 10, 21))
+    assert 'no successful run' in problem and 'circuit open' in problem
+
+
+def test_standby_counts_as_success(tmp_path):
+    record(tmp_path, 'v', at(19, 10, 20), health.STANDBY)
+    assert check('v', tmp_path, V_CRONTAB, now=at(19, 10, 21), lease_holder='other-host') == []
+
+
+def test_standby_host_cannot_vouch_for_failing_leader(tmp_path):
+    for tick in range(12):
+        minute = 5 * tick
+        record(tmp_path, 'v', at(19, 10, minute), health.ERROR, 'boom', holder='host-a')
+        record(tmp_path, 'v', at(19, 10, minute) + 30, health.STANDBY, holder='host-b')
+    now = at(19, 10, 58)
+
+    [problem] = check('v', tmp_path, V_CRONTAB, now=now, holder='host-a', lease_holder='host-a')
+    assert 'no successful run ever' in problem
+    assert check('v', tmp_path, V_CRONTAB, now=now, holder='host-b', lease_holder='host-a') == []
+    # Standby runs do not count for the host that holds the lease
+    [problem] = check('v', tmp_path, V_CRONTAB, now=now, holder='host-b', lease_holder='host-b')
+    assert 'no successful run ever' in problem
+
+    # A restart of the standby does not give the leader a new grace period
+    health.mark_started(status_path(tmp_path, 'v', 'host-b'), clock=lambda: now)
+    assert check('v', tmp_path, V_CRONTAB, now=now, holder='host-a', lease_holder='host-a') != []
+
+
+def test_standby_stays_healthy_after_the_lease_lapses(tmp_path):
+    # Jutarnja kronika stops at 9; the leader stops renewing and the lease lapses
+    for minute in range(0, 120, 5):
+        started = at(19, 7, 0) + minute * 60
+        record(tmp_path, 'jk', started, health.OK, holder='host-a')
+        record(tmp_path, 'jk', started + 30, health.STANDBY, holder='host-b')
+    afternoon = at(19, 14, 0)
+
+    assert check('jk', tmp_path, JK_CRONTAB, now=afternoon, holder='host-b', lease_holder=None) == []
+    assert check('jk', tmp_path, JK_CRONTAB, now=afternoon, holder='host-a', lease_holder=None) == []
+
+    # A leader whose failing runs let the lease lapse is still judged as the leader
+    failing = tmp_path / 'failing'
+    record(failing, 'jk', at(19, 8, 30), health.OK, holder='host-a')
+    for minute in (40, 45, 50, 55):
+        record(failing, 'jk', at(19, 8, minute), health.ERROR, 'boom', holder='host-a')
+    [problem] = check('jk', failing, JK_CRONTAB, now=afternoon, holder='host-a', lease_holder=None)
+    assert problem.endswith('(last outcome error: boom)')
+
+    # Standby runs alone never make the lease holder healthy; no "None" error in the message
+    [problem] = check('jk', tmp_path, JK_CRONTAB, now=afternoon, holder='host-b', lease_holder='host-b')
+    assert problem == 'no successful run ever (last outcome standby)'
+
+
+def test_threshold_follows_show_schedule(tmp_path):
+    # Jutarnja kronika only runs in the morning: an afternoon gap is expected
+    record(tmp_path, 'jk', at(19, 8, 55), health.OK)
+    assert check('jk', tmp_path, JK_CRONTAB, now=at(19, 16, 0)) == []
+    assert check('jk', tmp_path, JK_CRONTAB, now=at(20, 7, 5)) == []
+    assert check('jk', tmp_path, JK_CRONTAB, now=at(20, 7, 12)) != []
+
+
+def test_fresh_container_is_not_stale(tmp_path):
+    health.mark_started(status_path(tmp_path, 'jk'), clock=lambda: at(19, 12, 0))
+    assert check('jk', tmp_path, JK_CRONTAB, now=at(19, 16, 0)) == []
+    assert check('jk', tmp_path, JK_CRONTAB, now=at(20, 7, 15)) != []
+
+
+def test_stale_episodes_use_show_cadence(tmp_path):
+    start = datetime(2026, 10, 18, 4, 0, tzinfo=timezone.utc)
+    episodes = [(f'https://example.org/{h}.mp3', 'Vijesti', '', start + timedelta(hours=h))
+                for h in (0, 1, 2, 8, 9)]  # longest gap: 6 h overnight
+    store = EpisodeStore(tmp_path / 'v.episodes.json')
+    store.update(episodes, {mp3 for mp3, *_ in episodes})
+    store.save()
+
+    newest = episodes[-1][3]
+    now = newest.timestamp() + 8 * 3600
+    record(tmp_path, 'v', now - 60, health.OK, newest_episode=newest)
+    assert check('v', tmp_path, V_CRONTAB, now=now) == []
+    record(tmp_path, 'v', now + 7200 - 60, health.OK, newest_episode=newest)
+    [problem] = check('v', tmp_path, V_CRONTAB, now=now + 7200)
+    assert problem.startswith('newest episode is 10.0h old')
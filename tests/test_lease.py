@@ -0,0 +1,114 @@
+import pytest
+
+from lease import FileLeaseBackend, SQLiteLeaseBackend, Lease, LeaseLost, renew_if_scraping
+from statefile import write_json
+
+TTL = 60
+TICK = 300  # cron runs every 5 minutes
+HEARTBEAT = TTL / 3
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=['file', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'file':
+        return FileLeaseBackend(tmp_path / 'leases')
+    return SQLiteLeaseBackend(tmp_path / 'leases.sqlite')
+
+
+def make_hosts(backend, clock, count=2):
+    return [Lease(backend, 'feed-v', holder=f'host-{i}', ttl=TTL, clock=clock) for i in range(count)]
+
+
+def test_single_leader_and_fencing_token(backend):
+    clock = Clock()
+    a, b = make_hosts(backend, clock)
+
+    assert a.acquire()
+    assert not b.acquire()
+    assert a.acquire()  # re-acquiring our own lease keeps the term
+    assert a.token == 1
+
+    clock.now += TTL + 1
+    assert b.acquire()
+    assert b.token == 2
+    # The old leader is fenced off even though it still thinks it holds token 1
+    with pytest.raises(LeaseLost):
+        a.verify()
+
+
+def test_release_allows_immediate_takeover(backend):
+    clock = Clock()
+    a, b = make_hosts(backend, clock)
+    assert a.acquire()
+    a.release()
+    assert b.acquire()
+    assert b.token == 2
+
+
+def simulate(backend, clock, leader_dies_at, duration):
+    """Run two hosts on the same cron schedule; return fetch counts per tick and failover time"""
+    hosts = make_hosts(backend, clock)
+    alive = [True, True]
+    fetches = []
+    died_at = None
+    taken_over_at = None
+    leader = None
+    start = clock.now
+
+    while clock.now - start < duration:
+        if (clock.now - start) % TICK == 0:
+            tick = 0
+            for i, host in enumerate(hosts):
+                if alive[i] and host.acquire():
+                    tick += 1
+                    if leader is not None and i != leader and taken_over_at is None and died_at:
+                        taken_over_at = clock.now
+                    leader = i
+            fetches.append(tick)
+        if died_at is None and clock.now - start >= leader_dies_at:
+            alive[leader] = False
+            died_at = clock.now
+        # Heartbeat daemons renew held leases between ticks
+        for i, host in enumerate(hosts):
+            if alive[i] and host.token is not None:
+                host.renew()
+        clock.now += HEARTBEAT
+
+    return fetches, taken_over_at - died_at
+
+
+def test_failover_time_and_duplicate_fetch_rate(backend):
+    clock = Clock()
+    fetches, failover = simulate(backend, clock, leader_dies_at=TICK * 10 + 40, duration=TICK * 24)
+
+    # Exactly one host polls HRT on every tick: no duplicate fetches, no gaps
+    assert fetches == [1] * len(fetches)
+    # The standby takes over on the first tick after the lease expires
+    assert failover <= TTL + TICK
+
+
+def test_daemon_lets_lease_lapse_when_runs_stop_succeeding(backend, tmp_path):
+    clock = Clock()
+    a, b = make_hosts(backend, clock)
+    status = tmp_path / 'v.host-0.status.json'
+    assert a.acquire()
+
+    write_json(status, {'last_success': clock.now})
+    clock.now += TICK
+    assert renew_if_scraping(a, status, interval=TICK)
+
+    # Cron runs keep failing: the daemon stops renewing and a standby takes over
+    clock.now += TTL + HEARTBEAT
+    assert not renew_if_scraping(a, status, interval=TICK)
+    clock.now += TTL
+    assert b.acquire()
+    assert not renew_if_scraping(a, status, interval=TICK)
+    assert a.current()['holder'] == 'host-1'
@@ -0,0 +1,30 @@
+import json
+
+from profiling import NullProfiler, RunProfiler
+
+
+def test_stages_are_profiled_and_written(tmp_path):
+    profiler = RunProfiler(tmp_path, 'v')
+    with profiler.stage('parse'):
+        data = [str(i) * 100 for i in range(2000)]
+    with profiler.stage('render'):
+        ''.join(data)
+    with profiler.stage('parse'):  # repeated stages accumulate
+        sorted(data)
+
+    summary = profiler.write()
+
+    assert summary.splitlines()[0].startswith('Profile v')
+    assert summary.splitlines()[-1].startswith('tracemalloc snapshots took')
+    assert 0 < profiler.snapshot_time
+    rows = json.loads((profiler.out_dir / 'summary.json').read_text())
+    assert [row['stage'] for row in rows] == ['parse', 'render']
+    assert rows[0]['peak_kib'] > 100
+    for stage in ('parse', 'render'):
+        assert (profiler.out_dir / f'{stage}.prof').stat().st_size
+        assert 'Top allocations' in (profiler.out_dir / f'{stage}.txt').read_text()
+
+
+def test_null_profiler_is_a_no_op():
+    with NullProfiler().stage('fetch'):
+        pass
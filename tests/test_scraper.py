@@ -1,45 +1,23 @@
 import glob
+import pathlib
 import sys
-import xml.etree.ElementTree as ET
 
-def validate_feed(path):
-    try:
-        tree = ET.parse(path)
-    except ET.ParseError as e:
-        print(f"❌ FAILED to parse XML {path}: {e}")
-        return False
-
-    root = tree.getroot()
-    if not root.tag.lower().endswith('rss'):
-        print(f"❌ Root tag is not <rss> in {path} (got {root.tag})")
-        return False
-
-    channel = root.find('channel')
-    if channel is None:
-        print(f"❌ No <channel> element found in {path}")
-        return False
-
-    items = channel.findall('item')
-    if len(items) == 0:
-        print(f"❌ No <item> entries found in {path}")
-        return False
-
-    print(f"✅ {path} OK ({len(items)} items)")
-    return True
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / 'shared'))
+from feed_validator import validate_feeds, print_report  # noqa: E402
 
 def main():
     # find all .xml files one level down (feeds/<feed_name>/*.xml)
-    xml_files = glob.glob('feeds/*/*.xml')
+    xml_files = sorted(glob.glob('feeds/*/*.xml'))
     if not xml_files:
         print("❌ No feeds/*/*.xml files found")
         sys.exit(1)
 
-    all_ok = True
-    for xml in xml_files:
-        if not validate_feed(xml):
-            all_ok = False
+    # Feeds are validated in parallel, one streaming parse per process
+    reports = validate_feeds(xml_files)
+    for report in reports:
+        print_report(report)
 
-    if not all_ok:
+    if not all(report.ok for report in reports):
         sys.exit(1)
 
 if __name__ == '__main__':
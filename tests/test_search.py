@@ -0,0 +1,65 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from search import SearchIndex, fold, tokenize
+
+START = datetime(2026, 10, 19, 6, 0, tzinfo=timezone.utc)
+
+
+def episode(n, title, desc):
+    return (f'https://example.org/{n}.mp3', title, desc, START + timedelta(hours=n))
+
+
+def test_croatian_folding_and_tokens():
+    assert fold('Šibenik, Čakovec, Ćuprija, Žminj, Đakovo') == 'sibenik, cakovec, cuprija, zminj, dakovo'
+    assert tokenize('Vijesti iz Hrvatske i svijeta: Đakovo je 1. u Šport-u') == \
+        {'vijesti', 'hrvatske', 'svijeta', 'dakovo', 'sport'}
+
+
+def test_prefix_search_across_shows(tmp_path):
+    index = SearchIndex(tmp_path / 'search', tmp_path / 'search.json')
+    index.add('vijesti', [episode(1, 'Vijesti', 'Poplave u Zagrebu i Đakovu'),
+                          episode(2, 'Vijesti', 'Sjednica Vlade o proračunu')])
+    index.add('jutarnja-kronika', [episode(3, 'Jutarnja kronika', 'Gradonačelnik Zagreba o poplavama')])
+
+    assert index.search('zagreb') == [2, 0]
+    assert index.search('poplav zagrebu') == [0]
+    assert index.search('dakovu') == index.search('Đakovu') == [0]
+    assert index.search('Šibenik') == []
+
+
+def test_only_new_or_edited_episodes_touch_the_index(tmp_path):
+    index = SearchIndex(tmp_path / 'search', tmp_path / 'search.json')
+    first = [episode(1, 'Vijesti', 'Poplave u Zagrebu'), episode(2, 'Vijesti', 'Sjednica Vlade')]
+    assert index.add('vijesti', first) == 2
+
+    shard = tmp_path / 'search' / 'terms' / 'sj.json'
+    mtime = shard.stat().st_mtime_ns
+    assert index.add('vijesti', first) == 0
+    assert index.add('vijesti', first + [episode(3, 'Vijesti', 'Potres kod Petrinje')]) == 1
+    assert shard.stat().st_mtime_ns == mtime
+
+    # HRT edits the intro: old terms go, new ones come, the doc keeps its id
+    assert index.add('vijesti', [episode(1, 'Vijesti', 'Poplave u Splitu')]) == 1
+    assert index.search('zagreb') == []
+    assert index.search('split') == [0]
+    assert not (tmp_path / 'search' / 'terms' / 'za.json').read_text().count('zagrebu')
+
+    # Only the id counter is global state; mp3 -> doc id lives in small shards
+    assert json.loads((tmp_path / 'search.json').read_text()) == {'next_id': 3}
+    assert len(list((tmp_path / 'search-ids').glob('*.json'))) <= 3
+
+
+def test_matches_are_ranked_by_broadcast_time(tmp_path):
+    index = SearchIndex(tmp_path / 'search', tmp_path / 'search.json')
+    # Scraped newest first, so ids run against air dates; shows interleave
+    index.add('vijesti', [episode(n, 'Vijesti', 'Zagreb') for n in (9, 7, 5)])
+    index.add('jutarnja-kronika', [episode(n, 'Jutarnja kronika', 'Zagreb') for n in (8, 4)])
+
+    assert index.search('zagreb') == [0, 3, 1, 2, 4]
+    assert index.search('zagreb', limit=2) == [0, 3]
+
+    # A corrected broadcast time moves the episode in every posting list
+    index.add('jutarnja-kronika', [episode(4, 'Jutarnja kronika', 'Zagreb')[:3] + (START + timedelta(hours=10),)])
+    assert index.search('zagreb', limit=2) == [4, 0]
+    assert index.search('kronika') == [4, 3]
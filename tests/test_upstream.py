@@ -0,0 +1,94 @@
+import pytest
+
+from upstream import CircuitBreaker, CircuitOpen, TokenBucket, RateLimited
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def make_breaker(tmp_path, clock, transitions):
+    return CircuitBreaker('radio.hrt.hr', str(tmp_path), failure_threshold=3,
+                          cooldown=240, max_cooldown=1000, clock=clock,
+                          on_transition=lambda old, new, state: transitions.append((old, new)))
+
+
+def test_outage_probes_with_backoff_and_recovers(tmp_path):
+    clock = Clock()
+    transitions = []
+    breaker = make_breaker(tmp_path, clock, transitions)
+
+    assert breaker.allow() == 3
+    assert not breaker.record_failure('timeout')
+    assert not breaker.record_failure('timeout')
+    assert breaker.record_failure('timeout')
+    assert transitions == [('closed', 'open')]
+
+    # Ticks during the cooldown skip the fetch without touching HRT
+    clock.now += 200
+    with pytest.raises(CircuitOpen):
+        breaker.allow()
+
+    # Cooldown expired: one probe, which fails and doubles the cooldown
+    clock.now += 100
+    assert breaker.allow() == 1
+    assert breaker.record_failure('timeout')
+    assert breaker.state()['cooldown'] == 480
+    clock.now += 300
+    with pytest.raises(CircuitOpen):
+        breaker.allow()
+
+    # Next probe succeeds and restores full retries
+    clock.now += 200
+    assert breaker.allow() == 1
+    breaker.record_success()
+    assert breaker.allow() == 3
+    assert transitions == [('closed', 'open'), ('open', 'half-open'), ('half-open', 'open'),
+                           ('open', 'half-open'), ('half-open', 'closed')]
+
+
+def test_only_one_feed_probes_at_a_time(tmp_path):
+    clock = Clock()
+    v = make_breaker(tmp_path, clock, [])
+    jk = make_breaker(tmp_path, clock, [])
+    for _ in range(3):
+        v.record_failure('503')
+
+    clock.now += 300
+    assert v.allow() == 1
+    with pytest.raises(CircuitOpen):
+        jk.allow()
+
+
+def test_cooldown_is_capped(tmp_path):
+    clock = Clock()
+    breaker = make_breaker(tmp_path, clock, [])
+    for _ in range(3):
+        breaker.record_failure('503')
+    for _ in range(5):
+        clock.now = breaker.state()['open_until']
+        breaker.allow()
+        breaker.record_failure('503')
+    assert breaker.state()['cooldown'] == 1000
+
+
+def test_token_bucket_is_shared_and_refills(tmp_path):
+    clock = Clock()
+    v = TokenBucket('radio.hrt.hr', str(tmp_path), rate_per_minute=6, burst=2,
+                    clock=clock, sleep=clock.sleep)
+    jk = TokenBucket('radio.hrt.hr', str(tmp_path), rate_per_minute=6, burst=2,
+                     clock=clock, sleep=clock.sleep)
+
+    assert v.take() == 0
+    assert jk.take() == 0
+    # Bucket drained by the two feeds together; the next request waits for a refill
+    assert v.take() == pytest.approx(10)
+    with pytest.raises(RateLimited):
+        jk.take(max_wait=5)
@@ -0,0 +1,78 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from feedgen.feed import FeedGenerator
+from lxml import etree
+
+from websub import ATOM_NS, Publisher, add_hubs
+
+TOPIC = 'https://podcast.example.org/vijesti'
+
+
+@pytest.fixture
+def hub():
+    """Local stand-in for a WebSub hub / Podping endpoint"""
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['Content-Length'])).decode()
+            requests_seen.append(('POST', self.path, parse_qs(body), self.headers.get('Authorization')))
+            self.send_response(204)
+            self.end_headers()
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            requests_seen.append(('GET', url.path, parse_qs(url.query), self.headers.get('Authorization')))
+            self.send_response(200 if url.path != '/broken' else 500)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}', requests_seen
+    server.shutdown()
+
+
+def test_channel_advertises_hubs():
+    fg = FeedGenerator()
+    fg.title('Vijesti')
+    fg.link(href=TOPIC, rel='self')
+    fg.description('Test')
+    add_hubs(fg, ['https://hub.example.org/'])
+    fg.add_entry().title('Vijesti u 10')
+
+    channel = etree.fromstring(fg.rss_str()).find('channel')
+    links = {link.get('rel'): link.get('href') for link in channel.findall(f'{{{ATOM_NS}}}link')}
+    assert links == {'self': TOPIC, 'hub': 'https://hub.example.org/'}
+
+
+def test_publish_pings_hub_and_podping(hub):
+    base, seen = hub
+    publisher = Publisher(hubs=[f'{base}/hub'], podping_token='secret', podping_url=f'{base}/podping')
+
+    publisher.publish(TOPIC)
+    results = publisher.wait(timeout=5)
+
+    assert [error for target, error in results] == [None, None]
+    assert ('POST', '/hub', {'hub.mode': ['publish'], 'hub.url': [TOPIC]}, None) in seen
+    assert ('GET', '/podping', {'url': [TOPIC]}, 'secret') in seen
+
+
+def test_failed_ping_is_reported_not_raised(hub):
+    base, seen = hub
+    publisher = Publisher(hubs=[], podping_token='secret', podping_url=f'{base}/broken')
+    publisher.publish(TOPIC)
+    [(target, error)] = publisher.wait(timeout=5)
+    assert target.endswith('/broken') and '500' in error
+
+
+def test_disabled_publisher_does_nothing():
+    publisher = Publisher(hubs=[], podping_token=None)
+    publisher.publish(TOPIC)
+    assert publisher.wait() == []